@@ -1,11 +1,32 @@
-from .client import AniListClient
+from typing import TYPE_CHECKING
 
-from .parser import parse_media, parse_searched_media, parse_relation, parse_recommendation, parse_graphql_media_data, \
-    search_parser
+from .utils.lazy_import import lazy_exports
 
-from .queries import MediaQueryBuilder, SearchQueryBuilder, MediaQueryBuilderBase, UserActivityQueryBuilder
+# submodules are imported on first attribute access, models and builders load without gql/httpx
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    ".client": ["AniListClient"],
+    ".parser": ["parse_media", "parse_searched_media", "parse_relation", "parse_recommendation",
+                "parse_graphql_media_data", "parse_media_columns", "search_parser"],
+    ".queries": ["MediaQueryBuilder", "SearchQueryBuilder", "MediaQueryBuilderBase", "UserActivityQueryBuilder"],
+    ".models": ["AnilistMedia", "AnilistRelation", "AnilistRecommendation", "AnilistScore", "AnilistMediaInfo",
+                "MediaCoverImage", "AnilistMediaCharacter", "AnilistMediaBase", "AnilistTitle", "AnilistCharacter",
+                "AnilistStudio", "AnilistTag", "MediaSort", "MediaFormat", "MediaSeason", "MediaSource",
+                "MediaStatus", "MediaType", "MediaRelation", "MyStrEnum", "MediaGenre", "AnilistEpisode",
+                "AnilistSearchResult", "AnilistMediaBatch"],
+    ".index": ["MediaIndex", "IndexedMedia"],
+})
 
-from .models import AnilistMedia, AnilistRelation, AnilistRecommendation, AnilistScore, AnilistMediaInfo, \
-    MediaCoverImage, AnilistMediaCharacter, AnilistMediaBase, AnilistTitle, AnilistCharacter, AnilistStudio, \
-    AnilistTag, MediaSort, MediaFormat, MediaSeason, MediaSource, MediaStatus, MediaType, MediaRelation, MyStrEnum, \
-    MediaGenre, AnilistEpisode, AnilistSearchResult
+if TYPE_CHECKING:
+    from .client import AniListClient
+
+    from .parser import parse_media, parse_searched_media, parse_relation, parse_recommendation, \
+        parse_graphql_media_data, parse_media_columns, search_parser
+
+    from .queries import MediaQueryBuilder, SearchQueryBuilder, MediaQueryBuilderBase, UserActivityQueryBuilder
+
+    from .models import AnilistMedia, AnilistRelation, AnilistRecommendation, AnilistScore, AnilistMediaInfo, \
+        MediaCoverImage, AnilistMediaCharacter, AnilistMediaBase, AnilistTitle, AnilistCharacter, AnilistStudio, \
+        AnilistTag, MediaSort, MediaFormat, MediaSeason, MediaSource, MediaStatus, MediaType, MediaRelation, \
+        MyStrEnum, MediaGenre, AnilistEpisode, AnilistSearchResult, AnilistMediaBatch
+
+    from .index import MediaIndex, IndexedMedia
@@ -0,0 +1,14 @@
+from typing import TYPE_CHECKING
+
+from AnillistPython.utils.lazy_import import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    ".document": ["DocumentCache"],
+    ".response": ["ResponseCache", "CachedResponse"],
+    ".persisted": ["PersistedQueryRegistry", "persisted_query_error"],
+})
+
+if TYPE_CHECKING:
+    from .document import DocumentCache
+    from .response import ResponseCache, CachedResponse
+    from .persisted import PersistedQueryRegistry, persisted_query_error
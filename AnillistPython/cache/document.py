@@ -0,0 +1,76 @@
+from collections import OrderedDict
+from typing import Dict, Set, Any
+
+from gql import gql
+from graphql import DocumentNode
+
+
+def _document_node(document: Any) -> DocumentNode:
+    # gql >= 4 wraps the parsed document into a GraphQLRequest
+    return getattr(document, "document", document)
+
+
+def _node_id(document: Any) -> int:
+    return id(_document_node(document))
+
+
+class DocumentCache:
+    """
+    Bounded LRU cache of parsed GraphQL documents keyed on the query text.
+
+    Only the `DocumentNode` is cached, never a gql >= 4 `GraphQLRequest`: a request carries the variables of
+    one call and must not be shared between callers. Documents that were validated against the client schema
+    are remembered, so a cache hit skips both parsing and validation.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._documents: "OrderedDict[str, DocumentNode]" = OrderedDict()
+        self._cached: Set[int] = set()
+        self._validated: Set[int] = set()
+
+    def get(self, query: str) -> DocumentNode:
+        """Return the parsed document for `query`, parsing it only on a cache miss."""
+        document = self._documents.get(query)
+        if document is not None:
+            self.hits += 1
+            self._documents.move_to_end(query)
+            return document
+
+        self.misses += 1
+        document = _document_node(gql(query))
+        self._documents[query] = document
+        self._cached.add(id(document))
+        if len(self._documents) > self.maxsize:
+            _, evicted = self._documents.popitem(last=False)
+            node_id = id(evicted)
+            self._cached.discard(node_id)
+            self._validated.discard(node_id)
+        return document
+
+    def is_validated(self, document: Any) -> bool:
+        return _node_id(document) in self._validated
+
+    def mark_validated(self, document: Any):
+        # only cached documents are tracked, their ids stay stable while they are referenced here
+        node_id = _node_id(document)
+        if node_id in self._cached:
+            self._validated.add(node_id)
+
+    def clear(self):
+        self._documents.clear()
+        self._cached.clear()
+        self._validated.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._documents), "maxsize": self.maxsize}
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, query: str):
+        return query in self._documents
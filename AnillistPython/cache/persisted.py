@@ -0,0 +1,87 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+from gql.transport.exceptions import TransportQueryError
+from loguru import logger
+
+PERSISTED_QUERY_NOT_FOUND = "PERSISTED_QUERY_NOT_FOUND"
+PERSISTED_QUERY_NOT_SUPPORTED = "PERSISTED_QUERY_NOT_SUPPORTED"
+
+_ERROR_MESSAGES = {
+    "PersistedQueryNotFound": PERSISTED_QUERY_NOT_FOUND,
+    "PersistedQueryNotSupported": PERSISTED_QUERY_NOT_SUPPORTED,
+}
+
+
+def persisted_query_error(error: Exception) -> Optional[str]:
+    """`PERSISTED_QUERY_NOT_FOUND`/`PERSISTED_QUERY_NOT_SUPPORTED` when the server rejected a query hash."""
+    if not isinstance(error, TransportQueryError):
+        return None
+    for item in error.errors or ():
+        if not isinstance(item, dict):
+            continue
+        code = (item.get("extensions") or {}).get("code")
+        if code in (PERSISTED_QUERY_NOT_FOUND, PERSISTED_QUERY_NOT_SUPPORTED):
+            return code
+        if item.get("message") in _ERROR_MESSAGES:
+            return _ERROR_MESSAGES[item["message"]]
+    return None
+
+
+class PersistedQueryRegistry:
+    """
+    SHA-256 ids of the query documents sent in persisted query mode.
+
+    The hash of each query text is computed once. The registry can be saved as an Apollo persisted query
+    manifest, to preload a self-hosted GraphQL proxy so hash-only requests never miss.
+    """
+
+    def __init__(self):
+        self._queries: Dict[str, str] = {}
+        self._hashes: Dict[str, str] = {}
+
+    @staticmethod
+    def hash_query(query: str) -> str:
+        return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+    def register(self, query: str) -> str:
+        """Return the hash of `query`, remembering the query under it."""
+        query_hash = self._hashes.get(query)
+        if query_hash is None:
+            query_hash = self.hash_query(query)
+            self._hashes[query] = query_hash
+            self._queries[query_hash] = query
+        return query_hash
+
+    def get(self, query_hash: str) -> Optional[str]:
+        return self._queries.get(query_hash)
+
+    def save(self, path: Union[str, Path]):
+        manifest = {
+            "format": "apollo-persisted-query-manifest",
+            "version": 1,
+            "operations": [{"id": query_hash, "body": query, "type": "query"}
+                           for query_hash, query in self._queries.items()],
+        }
+        Path(path).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "PersistedQueryRegistry":
+        registry = cls()
+        manifest = json.loads(Path(path).read_text(encoding="utf-8"))
+        for operation in manifest.get("operations", []):
+            query_hash = registry.register(operation["body"])
+            if query_hash != operation.get("id", query_hash):
+                logger.warning(f"Persisted query {operation['id']} does not match its body, using {query_hash}")
+        return registry
+
+    def __contains__(self, query_hash: str) -> bool:
+        return query_hash in self._queries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._queries)
+
+    def __len__(self):
+        return len(self._queries)
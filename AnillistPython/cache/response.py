@@ -0,0 +1,138 @@
+import hashlib
+import json
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any, Union
+
+from loguru import logger
+
+from AnillistPython.utils import fastjson
+
+
+@dataclass
+class CachedResponse:
+    value: Dict[str, Any]
+    created_at: float
+    expires_at: float
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() >= self.expires_at
+
+
+class ResponseCache:
+    """
+    On-disk SQLite cache of API responses with a TTL per entry.
+
+    Expired entries are still returned for `stale_while_revalidate` seconds so the caller can serve them
+    while refreshing in the background. When the stored responses exceed `max_size_bytes` the least recently
+    used ones are evicted.
+    """
+
+    def __init__(self, path: Union[str, Path] = "anilist_cache.sqlite", max_size_bytes: int = 64 * 1024 * 1024,
+                 stale_while_revalidate: float = 3600):
+        self.path = Path(path)
+        self.max_size_bytes = max_size_bytes
+        self.stale_while_revalidate = stale_while_revalidate
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(query: str, variables: Optional[Dict[str, Any]] = None) -> str:
+        payload = json.dumps(variables or {}, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(f"{query}\0{payload}".encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT value, created_at, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or now >= row[2] + self.stale_while_revalidate:
+            self.misses += 1
+            return None
+
+        self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        entry = CachedResponse(fastjson.loads(row[0]), row[1], row[2])
+        if entry.is_stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float):
+        data = fastjson.dumps(value)
+        if len(data) > self.max_size_bytes:
+            logger.warning(f"Response of {len(data)} bytes is larger than the cache, not caching it")
+            return
+        now = time.time()
+        previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (key, value, size, created_at, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, data, len(data), now, now + ttl, now),
+        )
+        self._size += len(data) - (previous[0] if previous else 0)
+        if self._size > self.max_size_bytes:
+            self._evict()
+
+    def _evict(self):
+        # free a little more than needed so a burst of writes does not evict on every insert
+        target = int(self.max_size_bytes * 0.9)
+        now = time.time()
+        self._conn.execute("DELETE FROM responses WHERE expires_at + ? <= ?", (self.stale_while_revalidate, now))
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if self._size <= target:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._size <= target:
+                break
+            evicted.append((key,))
+            self._size -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        logger.debug(f"Evicted {len(evicted)} cached responses")
+
+    def delete(self, key: str):
+        row = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._size -= row[0]
+
+    def clear(self):
+        self._conn.execute("DELETE FROM responses")
+        self._size = 0
+
+    def close(self):
+        self._conn.close()
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses,
+                "size_bytes": self._size, "max_size_bytes": self.max_size_bytes}
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
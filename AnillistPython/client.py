@@ -1,31 +1,134 @@
 import asyncio
+import inspect
 import json
+import time
 # from calendar import error
 from pathlib import Path
 from pprint import pprint
-from typing import Optional, Union, List, Dict, Any
+from typing import Optional, Union, List, Dict, Any, Callable, Awaitable, Iterable, AsyncIterator, Tuple, FrozenSet
 
 import httpx
-from gql import Client, gql
+from gql import Client, GraphQLRequest, gql
+from gql.client import AsyncClientSession
 from gql.transport.exceptions import TransportError, TransportServerError, TransportQueryError
 from gql.transport.httpx import HTTPXTransport, HTTPXAsyncTransport
 
 from loguru import logger
-from graphql import ExecutionResult, GraphQLError
+from graphql import ExecutionResult, GraphQLError, DocumentNode
 
-from AnillistPython.models import MediaFormat, MediaSource, AnilistSearchResult
+from AnillistPython.models import MediaFormat, MediaSource, AnilistSearchResult, AnilistMediaBatch
 from AnillistPython.models import AnilistRecommendation, AnilistRelation, AnilistMedia, MediaType, MediaSort, MediaStatus
 from AnillistPython.queries import MediaQueryBuilder, SearchQueryBuilder, UserActivityQueryBuilder, MediaQueryBuilderBase
 from AnillistPython.parser import parse_recommendation, parse_graphql_media_data, parse_searched_media, \
-    parse_relation, parse_media
+    parse_relation, parse_media, compile_parse_plan
+from AnillistPython.cache import DocumentCache, ResponseCache, PersistedQueryRegistry, persisted_query_error
+from AnillistPython.cache.persisted import PERSISTED_QUERY_NOT_SUPPORTED
+from AnillistPython.utils import fastjson
+from AnillistPython.schema import load_schema
+from AnillistPython.concurrency import TaskResult, bounded_map, bounded_as_completed
+from AnillistPython.transport import TransportConfig, PooledHTTPXAsyncTransport, capture_response_headers, \
+    last_response_headers
+from AnillistPython.sync import SyncCheckpoint, SyncReport, SyncState
+from AnillistPython.ratelimit import RateLimiter, is_retryable, parse_retry_after, backoff_delay, error_status
+
+
+# seconds a cached listing stays fresh, per client method
+DEFAULT_CACHE_TTLS: Dict[str, float] = {
+    "trending": 15 * 60,
+    "popular": 6 * 60 * 60,
+    "top_rated": 6 * 60 * 60,
+    "latest": 30 * 60,
+}
+
+# builders are immutable, so the listings share these and their built queries stay cached between calls
+_TRENDING_FILTERS = SearchQueryBuilder().set_sort(MediaSort.TRENDING_DESC)
+_POPULAR_FILTERS = SearchQueryBuilder().set_sort(MediaSort.POPULARITY_DESC)
+_TOP_RATED_ANIME_FILTERS = SearchQueryBuilder().set_sort(MediaSort.SCORE_DESC).set_episodes_range(5).set_score_range(80, 99)
+_TOP_RATED_MANGA_FILTERS = SearchQueryBuilder().set_sort(MediaSort.SCORE_DESC).set_chapters_range(5).set_score_range(80, 99)
+_LATEST_MANGA_FILTERS = SearchQueryBuilder().set_sort(MediaSort.START_DATE_DESC).set_status([MediaStatus.RELEASING,])
+_LATEST_ANIME_FILTERS = (_LATEST_MANGA_FILTERS.set_formats([MediaFormat.TV,])
+                         .set_sources([MediaSource.MANGA, MediaSource.LIGHT_NOVEL, MediaSource.WEB_NOVEL]))
+# gql >= 4 executes a GraphQLRequest carrying the variables, older versions take the document and variable_values
+_EXECUTES_REQUESTS = "request" in inspect.signature(AsyncClientSession.execute).parameters
+# fields kept by MediaIndex, the default selection of sync_catalog
+_SYNC_FIELDS = (MediaQueryBuilder().include_title().include_images().include_synonyms().include_genres()
+                .include_tags().include_score().include_info().include_dates().include_is_adult()
+                .include_updated_at())
+
+
+def _parse_fields(builder: MediaQueryBuilderBase) -> Tuple[FrozenSet[str], Optional[FrozenSet[str]],
+                                                           Optional[FrozenSet[str]]]:
+    """Media, relation and recommendation fields of `builder`, a base builder selects no nested media."""
+    if isinstance(builder, MediaQueryBuilder):
+        return builder.included_options()
+    return builder.included_options(), None, None
+
+
+class _DocumentCacheClient(Client):
+    """gql client that validates each cached document against the schema only once."""
+
+    def __init__(self, *args, document_cache: DocumentCache, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.document_cache = document_cache
+
+    def validate(self, document: DocumentNode):
+        # gql >= 4 passes a GraphQLRequest wrapping the document, the cache handles both
+        if self.document_cache.is_validated(document):
+            return
+        super().validate(document)
+        self.document_cache.mark_validated(document)
 
-import copy
 
 class AniListClient:
-    def __init__(self, url="https://graphql.anilist.co"):
+    def __init__(self, url="https://graphql.anilist.co", document_cache_size: int = 128,
+                 offline_schema: bool = False, schema_cache_path: Optional[Union[str, Path]] = None,
+                 requests_per_minute: Optional[int] = 90, burst: int = 10, max_retries: int = 3,
+                 backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 response_cache: Optional[ResponseCache] = None, cache_ttls: Optional[Dict[str, float]] = None,
+                 persisted_queries: bool = False,
+                 persisted_query_registry: Optional[PersistedQueryRegistry] = None,
+                 transport_config: Optional[TransportConfig] = None):
+        """
+        :param offline_schema: build the schema from the bundled `schema.graphql` instead of fetching it
+            from the API on connect
+        :param schema_cache_path: optional file where the offline schema is pickled for faster cold starts
+        :param requests_per_minute: client side rate limit, None disables pacing
+        :param burst: number of requests that may be sent back to back before pacing kicks in
+        :param max_retries: retries for throttled (429), 5xx and network failures, honouring `Retry-After`
+        :param backoff_base: base delay in seconds of the jittered exponential backoff
+        :param backoff_max: upper bound of a single backoff delay in seconds
+        :param response_cache: opt-in on-disk cache for the trending, popular, top rated and latest listings
+        :param cache_ttls: overrides of `DEFAULT_CACHE_TTLS`
+        :param persisted_queries: send only the SHA-256 of each query (automatic persisted queries) and the full
+            text only when the server does not know the hash yet. AniList itself does not support this, it is
+            meant for a GraphQL proxy in front of it
+        :param persisted_query_registry: registry of the sent queries, e.g. one loaded from a manifest
+        :param transport_config: HTTP/2, connection pool, keep-alive, timeout and compression settings, with
+            `shared_pool=True` clients of the same config reuse each other's connections
+        """
+        self.document_cache = DocumentCache(document_cache_size)
+        self.rate_limiter = RateLimiter(requests_per_minute, burst) if requests_per_minute else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.response_cache = response_cache
+        self.cache_ttls = {**DEFAULT_CACHE_TTLS, **(cache_ttls or {})}
+        self._revalidations: Dict[str, asyncio.Task] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.coalesced_requests = 0
+        self.persisted_queries = persisted_queries
+        self.persisted_query_registry = (persisted_query_registry if persisted_query_registry is not None
+                                         else PersistedQueryRegistry())
+        self.persisted_query_misses = 0
         try:
-            self.transport = HTTPXAsyncTransport(url=url)
-            self.client = Client(transport=self.transport, fetch_schema_from_transport=True)
+            self.transport_config = transport_config or TransportConfig()
+            self.transport = PooledHTTPXAsyncTransport(url, self.transport_config, json_deserialize=fastjson.loads)
+            if offline_schema:
+                schema_kwargs = {"schema": load_schema(cache_path=schema_cache_path)}
+            else:
+                schema_kwargs = {"fetch_schema_from_transport": True}
+            self.client = _DocumentCacheClient(transport=self.transport, document_cache=self.document_cache,
+                                               execute_timeout=self.transport_config.timeout, **schema_kwargs)
         except httpx.ConnectError as e:
             logger.error(f"Failed to connect to AniList API: {e}")
             raise ConnectionError("Unable to connect to AniList API.") from e
@@ -43,6 +146,7 @@ class AniListClient:
             raise
 
         self.session = None
+        self._connect_lock = asyncio.Lock()
 
         self.media_query_builder = MediaQueryBuilder()
         self.search_query_builder = SearchQueryBuilder()
@@ -59,19 +163,132 @@ class AniListClient:
             raise
 
     async def close(self):
-        try:
-            await self.transport.client.aclose()
-        except AttributeError as e:
-            logger.error(f"Client never initialized: {e}")
-        except:
-            raise
+        for task in list(self._revalidations.values()):
+            task.cancel()
+        if self.session is None:
+            logger.error("Client never initialized")
+            return
+        # releases the connection pool, a shared one is only closed by its last client
+        await self.transport.close()
+        self.session = None
 
-    async def fetch(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    async def _ensure_connected(self):
         if not self.session:
-            await self.connect()
-
+            async with self._connect_lock:
+                if not self.session:
+                    await self.connect()
+
+    async def map(self, coro_fn: Callable[[Any], Awaitable[Any]], items: Iterable[Any], concurrency: int = 5,
+                  return_exceptions: bool = False, with_timing: bool = False) -> List[Any]:
+        """
+        Await `coro_fn(item)` for every item with at most `concurrency` calls in flight over the shared session.
+
+        Results are returned in input order. The first exception cancels the remaining calls and is re-raised
+        unless `return_exceptions` is set. With `with_timing` a `TaskResult` with the elapsed time is returned
+        per item.
+
+            animes = await client.map(lambda media_id: client.get_anime(media_id, builder), ids, concurrency=10)
+        """
+        await self._ensure_connected()
+        return await bounded_map(coro_fn, items, concurrency, return_exceptions, with_timing)
+
+    async def as_completed(self, coro_fn: Callable[[Any], Awaitable[Any]], items: Iterable[Any],
+                           concurrency: int = 5, return_exceptions: bool = False) -> AsyncIterator[TaskResult]:
+        """Streaming variant of `map`, yields a `TaskResult` per item as soon as it finishes."""
+        await self._ensure_connected()
+        async for task_result in bounded_as_completed(coro_fn, items, concurrency, return_exceptions):
+            yield task_result
+
+    async def fetch(self, query: str, variables: Optional[Dict[str, Any]] = None,
+                    cache_ttl: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Execute `query` and return the response data.
+
+        With a `response_cache` configured and a `cache_ttl`, fresh cached responses are returned without a
+        request and stale ones are returned while they are refreshed in the background.
+        """
+        if not cache_ttl or self.response_cache is None:
+            return await self._single_flight(query, variables)
+
+        key = ResponseCache.make_key(query, variables)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            if cached.is_stale:
+                self._revalidate(key, query, variables, cache_ttl)
+            return cached.value
+
+        result = await self._single_flight(query, variables)
+        self.response_cache.set(key, result, cache_ttl)
+        return result
+
+    async def _single_flight(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Share one request between concurrent callers asking for the same query and variables."""
+        key = ResponseCache.make_key(query, variables)
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced_requests += 1
+            # shielded so a cancelled follower does not cancel the request of the others
+            return await asyncio.shield(in_flight)
+
+        task = asyncio.ensure_future(self._request(query, variables))
+        self._in_flight[key] = task
+
+        def done(finished: asyncio.Future):
+            self._in_flight.pop(key, None)
+            # mark the error as retrieved when every caller went away before the request finished
+            if not finished.cancelled():
+                finished.exception()
+
+        task.add_done_callback(done)
+        return await asyncio.shield(task)
+
+    def _revalidate(self, key: str, query: str, variables: Optional[Dict[str, Any]], cache_ttl: float):
+        if key in self._revalidations:
+            return
+
+        async def refresh():
+            try:
+                self.response_cache.set(key, await self._single_flight(query, variables), cache_ttl)
+            except Exception as e:
+                logger.warning(f"Background refresh of a cached response failed: {e}")
+            finally:
+                self._revalidations.pop(key, None)
+
+        self._revalidations[key] = asyncio.create_task(refresh())
+
+    async def _request(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        await self._ensure_connected()
+
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+            # headers of this attempt only, concurrent requests share the transport
+            with capture_response_headers():
+                try:
+                    return await self._execute(query, variables)
+                except Exception as e:
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        raise
+                    retry_after = None
+                    if error_status(e) == 429:
+                        retry_after = parse_retry_after(last_response_headers())
+                    if retry_after is None:
+                        delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                    else:
+                        # the rate limiter already holds every request back until Retry-After expires
+                        delay = 0.0 if self.rate_limiter else retry_after
+                    attempt += 1
+                    logger.warning(f"Request failed ({e}), retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def _execute(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         try:
-            result = await self.session.execute(gql(query), variable_values=variables)
+            document = self.document_cache.get(query)
+            if self.persisted_queries:
+                result = await self._execute_persisted(query, document, variables)
+            else:
+                result = await self._session_execute(document, variables)
 
             # print(result)
 
@@ -96,12 +313,40 @@ class AniListClient:
         except Exception as e:
             logger.exception("Unhandled exception during fetch")
             raise
+        finally:
+            if self.rate_limiter:
+                self.rate_limiter.update_from_headers(last_response_headers())
+
+    async def _execute_persisted(self, query: str, document, variables: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Send the query hash only, falling back to the full text when the server does not know it."""
+        query_hash = self.persisted_query_registry.register(query)
+        payload = {"variables": variables or {},
+                   "extensions": {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}}
+        try:
+            # the document is still validated locally, only the posted body is replaced
+            return await self._session_execute(document, variables, extra_args={"json": payload})
+        except TransportQueryError as e:
+            code = persisted_query_error(e)
+            if code is None:
+                raise
+            self.persisted_query_misses += 1
+            if code == PERSISTED_QUERY_NOT_SUPPORTED:
+                logger.warning("Server does not support persisted queries, sending full query text from now on")
+                self.persisted_queries = False
+                return await self._session_execute(document, variables)
+            logger.debug(f"Persisted query {query_hash} not found, sending its full text")
+            return await self._session_execute(document, variables, extra_args={"json": {**payload, "query": query}})
+
+    async def _session_execute(self, document: DocumentNode, variables: Optional[Dict[str, Any]], **kwargs):
+        # the cached document is shared between calls, the variables travel in a request built for this one
+        if _EXECUTES_REQUESTS:
+            return await self.session.execute(GraphQLRequest(document, variable_values=variables), **kwargs)
+        return await self.session.execute(document, variable_values=variables, **kwargs)
 
     async def get_anime(self, media_id: int, builder: Optional[MediaQueryBuilder]) -> Optional[AnilistMedia]:
         if not builder:
             builder = self.media_query_builder
-        builder = copy.deepcopy(builder)
-        builder.include_anime_fields()
+        builder = builder.include_anime_fields()
         query = builder.build()
         logger.debug(f"query: \n{query}, media_id: {media_id}")
         result = await self.fetch(query, variables={"id": media_id})
@@ -110,22 +355,60 @@ class AniListClient:
         return anime
 
 
+    async def get_media_many(self, ids: List[int], builder: Optional[MediaQueryBuilderBase] = None,
+                             media_type: Optional[MediaType] = None, chunk_size: int = 50,
+                             concurrency: int = 4) -> AnilistMediaBatch:
+        """
+        Fetch many media by id, packing up to `chunk_size` ids into each request with `id_in`.
+
+        Chunks are fetched concurrently, at most `concurrency` at a time. Results keep the order of `ids`,
+        ids AniList did not return are None in `medias` and listed in `missing`.
+        """
+        if not 0 < chunk_size <= 50:
+            raise ValueError("chunk_size must be between 1 and 50")
+        if not builder:
+            builder = self.media_query_builder
+        if media_type == MediaType.ANIME:
+            builder = builder.include_anime_fields()
+        elif media_type == MediaType.MANGA:
+            builder = builder.include_manga_fields()
+        query = builder.build_batch()
+        plan = compile_parse_plan(*_parse_fields(builder))
+
+        unique_ids = list(dict.fromkeys(ids))
+        chunks = [unique_ids[i:i + chunk_size] for i in range(0, len(unique_ids), chunk_size)]
+
+        async def fetch_chunk(chunk: List[int]) -> List[Dict[str, Any]]:
+            result = await self.fetch(query, variables={"ids": chunk, "perpage": len(chunk)})
+            return (result.get("Page") or {}).get("media") or []
+
+        found: Dict[int, AnilistMedia] = {}
+        for medias in await self.map(fetch_chunk, chunks, concurrency):
+            for media_data in medias:
+                media = parse_media(media_data, media_type, plan=plan)
+                if media:
+                    found[media.id] = media
+
+        missing = [media_id for media_id in unique_ids if media_id not in found]
+        if missing:
+            logger.warning(f"{len(missing)} of {len(unique_ids)} media ids were not returned: {missing}")
+        return AnilistMediaBatch(medias=[found.get(media_id) for media_id in ids], missing=missing)
+
     async def search_anime(self, builder: Optional[MediaQueryBuilder], filters: SearchQueryBuilder,
-                        query: Optional[str], page: int = 1, perpage: int = 5) -> AnilistSearchResult:
+                        query: Optional[str], page: int = 1, perpage: int = 5,
+                        cache_ttl: Optional[float] = None, lazy: bool = False) -> AnilistSearchResult:
+        """With `lazy` the result holds `LazyAnilistMedia` parsed attribute by attribute on access."""
         if not builder:
             builder = self.media_query_builder
-        builder = copy.deepcopy(builder)
-        filters = copy.deepcopy(filters)
-        builder.include_anime_fields()
+        builder = builder.include_anime_fields()
+        filters = filters.set_type(MediaType.ANIME)
+        variables = {**filters.filter_variables(), "page": page, "perpage": perpage}
         if query:
-            variables = {"page": page, "perpage": perpage, "query": query}
-        else:
-            variables = {"page": page, "perpage": perpage}
-        filters.set_type(MediaType.ANIME)
+            variables["query"] = query
 
         search_query = filters.build(builder)
         # logger.debug(f"query: \n{search_query}")
-        result = await self.fetch(search_query, variables)
+        result = await self.fetch(search_query, variables, cache_ttl)
 
         # with open("animes.json", "w", encoding="utf-8") as f:
         #     json.dump(result, f, ensure_ascii=False, indent=4)
@@ -133,35 +416,199 @@ class AniListClient:
         # with open("animes.json", "r", encoding="utf-8") as f:
         #     animes = json.load(f)
 
-        fields = builder.included_options()
-        return parse_searched_media(result, MediaType.ANIME, fields[0], fields[1], fields[2])
+        return parse_searched_media(result, MediaType.ANIME, *_parse_fields(builder), lazy=lazy)
 
 
     async def get_manga(self, media_id: int, builder: Optional[MediaQueryBuilder]) -> AnilistMedia:
         if not builder:
             builder = self.media_query_builder
-        builder = copy.deepcopy(builder)
-        builder.include_manga_fields()
+        builder = builder.include_manga_fields()
         query = builder.build()
         result = await self.fetch(query)
         manga = parse_graphql_media_data(result, MediaType.MANGA)
         return manga
 
     async def search_manga(self, builder: Optional[MediaQueryBuilder], filters: SearchQueryBuilder,
-                        query: Optional[str], page: int = 1, perpage: int = 5) -> AnilistSearchResult:
+                        query: Optional[str], page: int = 1, perpage: int = 5,
+                        cache_ttl: Optional[float] = None, lazy: bool = False) -> AnilistSearchResult:
+        """With `lazy` the result holds `LazyAnilistMedia` parsed attribute by attribute on access."""
         if not builder:
             builder = self.media_query_builder
-        builder = copy.deepcopy(builder)
-        filters = copy.deepcopy(filters)
-        builder.include_manga_fields()
+        builder = builder.include_manga_fields()
+        filters = filters.set_type(MediaType.MANGA)
+        variables = {**filters.filter_variables(), "page": page, "perpage": perpage}
         if query:
-            variables = {"page": page, "perpage": perpage, "query": query}
-        else:
-            variables = {"page": page, "perpage": perpage}
-        filters.set_type(MediaType.MANGA)
+            variables["query"] = query
         search_query = filters.build(builder)
-        result = await self.fetch(search_query, variables)
-        return parse_searched_media(result, MediaType.MANGA)
+        result = await self.fetch(search_query, variables, cache_ttl)
+        return parse_searched_media(result, MediaType.MANGA, lazy=lazy)
+
+    async def iter_search(self, media_type: MediaType, builder: Optional[MediaQueryBuilder] = None,
+                          filters: Optional[SearchQueryBuilder] = None, query: Optional[str] = None,
+                          per_page: int = 50, max_items: Optional[int] = None,
+                          start_page: int = 1, lazy: bool = False) -> AsyncIterator[AnilistMedia]:
+        """
+        Walk every search page lazily, yielding media one by one.
+
+        The next page is requested while the current one is consumed, so only two pages are held in memory.
+        Iteration stops after `max_items` media when given.
+        """
+        if not 0 < per_page <= 50:
+            raise ValueError("per_page must be between 1 and 50")
+        search = self.search_anime if media_type == MediaType.ANIME else self.search_manga
+        if filters is None:
+            filters = self.search_query_builder
+
+        page = start_page
+        yielded = 0
+        next_page: Optional[asyncio.Future] = asyncio.ensure_future(
+            search(builder, filters, query, page, per_page, lazy=lazy))
+        try:
+            while next_page is not None:
+                result = await next_page
+                next_page = None
+                if (result.pageInfo.hasNextPage and result.medias
+                        and (max_items is None or yielded + len(result.medias) < max_items)):
+                    page += 1
+                    next_page = asyncio.ensure_future(search(builder, filters, query, page, per_page, lazy=lazy))
+
+                for media in result.medias:
+                    if max_items is not None and yielded >= max_items:
+                        return
+                    yield media
+                    yielded += 1
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+    async def crawl_search(self, media_type: MediaType, builder: Optional[MediaQueryBuilder] = None,
+                           filters: Optional[SearchQueryBuilder] = None, query: Optional[str] = None,
+                           per_page: int = 50, concurrency: int = 5, ordered: bool = True,
+                           max_pages: Optional[int] = None, lazy: bool = False) -> AsyncIterator[AnilistSearchResult]:
+        """
+        Fetch every page of a search, yielding `AnilistSearchResult` pages.
+
+        The first page tells the `lastPage`, the remaining pages are then fetched concurrently with at most
+        `concurrency` requests in flight. With `ordered` pages are yielded in page order, otherwise as soon
+        as they arrive.
+        """
+        if not 0 < per_page <= 50:
+            raise ValueError("per_page must be between 1 and 50")
+        search = self.search_anime if media_type == MediaType.ANIME else self.search_manga
+        if filters is None:
+            filters = self.search_query_builder
+
+        first_page = await search(builder, filters, query, 1, per_page, lazy=lazy)
+        yield first_page
+        last_page = first_page.pageInfo.lastPage
+        if max_pages is not None:
+            last_page = min(last_page, max_pages)
+        if last_page < 2:
+            return
+
+        async def fetch_page(page: int) -> AnilistSearchResult:
+            return await search(builder, filters, query, page, per_page, lazy=lazy)
+
+        pages = range(2, last_page + 1)
+        if not ordered:
+            async for task_result in self.as_completed(fetch_page, pages, concurrency):
+                yield task_result.result
+            return
+
+        buffered: Dict[int, AnilistSearchResult] = {}
+        next_page = 2
+        async for task_result in self.as_completed(fetch_page, pages, concurrency):
+            buffered[task_result.item] = task_result.result
+            while next_page in buffered:
+                yield buffered.pop(next_page)
+                next_page += 1
+
+    async def sync_catalog(self, media_type: MediaType, store: Any, checkpoint: SyncCheckpoint,
+                           builder: Optional[MediaQueryBuilder] = None, filters: Optional[SearchQueryBuilder] = None,
+                           per_page: int = 50, key: Optional[str] = None) -> SyncReport:
+        """
+        Store the media changed since the last sync, newest changes first.
+
+        Pages are requested sorted by `UPDATED_AT_DESC` until the `updatedAt` high-water mark saved in `checkpoint`
+        is reached, so a sync only costs the pages holding changes and the first sync crawls the whole catalog.
+        The changed media of each page are passed to `store.add_many(medias)` (e.g. a `MediaIndex`, the method
+        may be async). The checkpoint is written after every page, a sync interrupted half-way continues from
+        its last page when run again.
+
+        :param builder: media fields to fetch, `updatedAt` is always added
+        :param filters: restrict the synced catalog, must not set a sort
+        :param key: checkpoint entry of this catalog, defaults to the media type and the filters
+        """
+        if not 0 < per_page <= 50:
+            raise ValueError("per_page must be between 1 and 50")
+        search = self.search_anime if media_type == MediaType.ANIME else self.search_manga
+        builder = (builder or _SYNC_FIELDS).include_updated_at()
+        if filters is None:
+            filters = self.search_query_builder
+        filters = filters.set_sort(MediaSort.UPDATED_AT_DESC)
+        key = key or f"{media_type.value}:{filters.stable_hash()[:16]}"
+
+        state = checkpoint.get(key)
+        since, since_ids = state.updated_at, set(state.ids)
+        report = SyncReport(key=key, since=since, updated_at=since)
+        started = time.perf_counter()
+        page = 1
+        if state.in_progress:
+            # media may have moved by a few positions since, so the last stored page is fetched again
+            page = report.resumed_from_page = state.run_page
+            logger.info(f"Resuming sync of {key} from page {page}")
+        high_water, high_water_ids = state.run_updated_at, list(state.run_ids)
+
+        next_page: Optional[asyncio.Future] = asyncio.ensure_future(search(builder, filters, None, page, per_page))
+        try:
+            while next_page is not None:
+                result = await next_page
+                next_page = None
+                changed = []
+                reached_checkpoint = False
+                for media in result.medias:
+                    updated_at = media.updatedAt
+                    if since is not None and updated_at is not None:
+                        if updated_at < since:
+                            reached_checkpoint = True
+                            break
+                        if updated_at == since and media.id in since_ids:
+                            continue
+                    changed.append(media)
+                    if updated_at is None:
+                        continue
+                    if high_water is None or updated_at > high_water:
+                        high_water, high_water_ids = updated_at, [media.id]
+                    elif updated_at == high_water and media.id not in high_water_ids:
+                        high_water_ids.append(media.id)
+
+                if not reached_checkpoint and result.pageInfo.hasNextPage and result.medias:
+                    next_page = asyncio.ensure_future(search(builder, filters, None, page + 1, per_page))
+                report.pages += 1
+                report.fetched += len(result.medias)
+                if changed:
+                    stored = store.add_many(changed)
+                    if inspect.isawaitable(stored):
+                        await stored
+                    report.stored += len(changed)
+                if next_page is not None:
+                    checkpoint.set(key, SyncState(since, sorted(since_ids), high_water, high_water_ids, page))
+                page += 1
+        finally:
+            if next_page is not None and not next_page.done():
+                next_page.cancel()
+
+        if high_water is not None and (since is None or high_water > since):
+            final = SyncState(high_water, sorted(high_water_ids))
+        elif high_water is not None and high_water == since:
+            final = SyncState(since, sorted(since_ids.union(high_water_ids)))
+        else:
+            final = SyncState(since, sorted(since_ids))
+        checkpoint.set(key, final)
+        report.updated_at = final.updated_at
+        report.elapsed = time.perf_counter() - started
+        logger.info(f"Synced {key}: {report.stored} changed media in {report.pages} pages")
+        return report
 
     async def get_recommendations(self, builder: MediaQueryBuilderBase, media_id: int, page: int = 1, perpage: int = 5) -> Optional[List[AnilistRecommendation]]:
         if not builder:
@@ -215,39 +662,36 @@ class AniListClient:
         return [parse_relation(relation, media_id) for relation in relations]
 
     async def get_trending(self, fields: MediaQueryBuilder, media_type: MediaType, page: int = 1, per_page: int = 5)->AnilistSearchResult:
-        search_query = SearchQueryBuilder().set_sort(MediaSort.TRENDING_DESC)
         if media_type == MediaType.ANIME:
-            return await self.search_anime(fields, search_query, None, page, per_page)
+            return await self.search_anime(fields, _TRENDING_FILTERS, None, page, per_page,
+                                           self.cache_ttls.get("trending"))
         else:
-            return await self.search_manga(fields, search_query, None, page, per_page)
+            return await self.search_manga(fields, _TRENDING_FILTERS, None, page, per_page,
+                                           self.cache_ttls.get("trending"))
 
     async def get_top_popular(self, fields: MediaQueryBuilder, media_type: MediaType, page: int = 1, per_page: int = 5)->AnilistSearchResult:
-        search_query = SearchQueryBuilder().set_sort(MediaSort.POPULARITY_DESC)
         if media_type == MediaType.ANIME:
-            return await self.search_anime(fields, search_query, None, page, per_page)
+            return await self.search_anime(fields, _POPULAR_FILTERS, None, page, per_page,
+                                           self.cache_ttls.get("popular"))
         else:
-            return await self.search_manga(fields, search_query, None, page, per_page)
+            return await self.search_manga(fields, _POPULAR_FILTERS, None, page, per_page,
+                                           self.cache_ttls.get("popular"))
 
     async def get_top_rated(self, fields: MediaQueryBuilder, media_type: MediaType, page: int = 1, per_page: int = 5)->AnilistSearchResult:
-        search_query = SearchQueryBuilder().set_sort(MediaSort.SCORE_DESC)
         if media_type == MediaType.ANIME:
-            search_query.set_episodes_range(5)
-            search_query.set_score_range(80, 99)
-            return await self.search_anime(fields, search_query, None, page, per_page)
+            return await self.search_anime(fields, _TOP_RATED_ANIME_FILTERS, None, page, per_page,
+                                           self.cache_ttls.get("top_rated"))
         else:
-            search_query.set_chapters_range(5)
-            search_query.set_score_range(80, 99)
-            return await self.search_manga(fields, search_query, None, page, per_page)
+            return await self.search_manga(fields, _TOP_RATED_MANGA_FILTERS, None, page, per_page,
+                                           self.cache_ttls.get("top_rated"))
 
     async def get_latest(self, fields: MediaQueryBuilder, media_type: MediaType, page: int = 1, per_page: int = 5)->AnilistSearchResult:
-        search_query = SearchQueryBuilder().set_sort(MediaSort.START_DATE_DESC).set_status([MediaStatus.RELEASING,])
-        # print("search_query:", search_query.build(fields))
         if media_type == MediaType.ANIME:
-            search_query.set_formats([MediaFormat.TV,])
-            search_query.set_sources([MediaSource.MANGA, MediaSource.LIGHT_NOVEL, MediaSource.WEB_NOVEL])
-            return await self.search_anime(fields, search_query, None, page, per_page)
+            return await self.search_anime(fields, _LATEST_ANIME_FILTERS, None, page, per_page,
+                                           self.cache_ttls.get("latest"))
         else:
-            return await self.search_manga(fields, search_query, None, page, per_page)
+            return await self.search_manga(fields, _LATEST_MANGA_FILTERS, None, page, per_page,
+                                           self.cache_ttls.get("latest"))
 
     async def get_user_activity(self, query: str, variables: dict = None) -> dict:
         raise NotImplementedError("Not implemented")
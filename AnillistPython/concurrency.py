@@ -0,0 +1,89 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Generic, Iterable, List, Optional, TypeVar, Union
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class TaskResult(Generic[T, R]):
+    index: int  # position of the item in the input
+    item: T
+    result: Optional[R] = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0  # seconds spent in the coroutine, time queued behind the limit excluded
+
+
+_WORKER_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def bounded_as_completed(coro_fn: Callable[[T], Awaitable[R]], items: Iterable[T], concurrency: int = 5,
+                               return_exceptions: bool = False) -> AsyncIterator[TaskResult[T, R]]:
+    """
+    Run `coro_fn` over `items` with at most `concurrency` calls in flight, yielding results as they finish.
+
+    Items are pulled lazily from `items`. The first exception cancels every running call and is re-raised,
+    unless `return_exceptions` is set, in which case it is reported in `TaskResult.error`.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be at least 1")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    pending_items = enumerate(items)
+
+    async def worker():
+        try:
+            for index, item in pending_items:
+                started = time.perf_counter()
+                try:
+                    result = await coro_fn(item)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    await queue.put(TaskResult(index, item, error=e, elapsed=time.perf_counter() - started))
+                    continue
+                await queue.put(TaskResult(index, item, result, elapsed=time.perf_counter() - started))
+        except Exception as e:
+            await queue.put(_Failure(e))
+        finally:
+            await queue.put(_WORKER_DONE)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    running = len(workers)
+    try:
+        while running:
+            entry = await queue.get()
+            if entry is _WORKER_DONE:
+                running -= 1
+            elif isinstance(entry, _Failure):
+                raise entry.error
+            else:
+                yield entry
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def bounded_map(coro_fn: Callable[[T], Awaitable[R]], items: Iterable[T], concurrency: int = 5,
+                      return_exceptions: bool = False,
+                      with_timing: bool = False) -> Union[List[Any], List[TaskResult[T, R]]]:
+    """
+    Like `bounded_as_completed` but returns the results in input order.
+
+    With `with_timing` the `TaskResult` objects are returned instead of the bare results.
+    """
+    results: List[TaskResult[T, R]] = []
+    async for task_result in bounded_as_completed(coro_fn, items, concurrency, return_exceptions):
+        results.append(task_result)
+    results.sort(key=lambda task_result: task_result.index)
+    if with_timing:
+        return results
+    return [task_result.error if task_result.error is not None else task_result.result for task_result in results]
@@ -0,0 +1,10 @@
+from typing import TYPE_CHECKING
+
+from AnillistPython.utils.lazy_import import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    ".arrow": ["MediaParquetWriter", "media_to_record_batch", "media_schema"],
+})
+
+if TYPE_CHECKING:
+    from .arrow import MediaParquetWriter, media_to_record_batch, media_schema
@@ -0,0 +1,227 @@
+"""
+Columnar export of media to Arrow record batches and Parquet files.
+
+Needs pyarrow (`pip install AnilistPython[arrow]`). Nested models are flattened into one column per field
+(`title_romaji`, `score_average`, `info_format`, ...), genres, tags, studios and synonyms become list columns
+and dates Arrow dates, so a dump loads into pandas, polars or DuckDB without any per-row conversion.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterable, Callable, Iterable, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from AnillistPython.models import AnilistMedia, AnilistSearchResult
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Arrow export needs the pyarrow package, install it with `pip install AnilistPython[arrow]`")
+
+
+def _nested(attribute: str, field: str) -> Callable[[AnilistMedia], Any]:
+    def get(media: AnilistMedia) -> Any:
+        value = getattr(media, attribute)
+        return getattr(value, field) if value is not None else None
+    return get
+
+
+def _enum(getter: Callable[[AnilistMedia], Any]) -> Callable[[AnilistMedia], Optional[str]]:
+    def get(media: AnilistMedia) -> Optional[str]:
+        value = getter(media)
+        return value.value if value is not None else None
+    return get
+
+
+def _date(attribute: str) -> Callable[[AnilistMedia], Any]:
+    def get(media: AnilistMedia) -> Any:
+        value: Optional[datetime] = getattr(media, attribute)
+        return value.date() if value is not None else None
+    return get
+
+
+def _names(attribute: str, field: str = "name") -> Callable[[AnilistMedia], Optional[List[str]]]:
+    def get(media: AnilistMedia) -> Optional[List[str]]:
+        items = getattr(media, attribute)
+        if items is None:
+            return None
+        return [getattr(item, field) for item in items if item is not None]
+    return get
+
+
+def _genres(media: AnilistMedia) -> Optional[List[str]]:
+    genres = media.genres
+    return [genre.value for genre in genres if genre is not None] if genres is not None else None
+
+
+def _cover_image(media: AnilistMedia) -> Optional[str]:
+    cover = media.coverImage
+    return (cover.large or cover.medium or cover.extraLarge) if cover is not None else None
+
+
+# in the order of COLUMN_GETTERS, a function so the module imports without pyarrow
+def _column_types() -> List[Tuple[str, Any]]:
+    string, int32, category = pa.string(), pa.int32(), pa.dictionary(pa.int8(), pa.string())
+    return [
+        ("id", pa.int64()),
+        ("id_mal", pa.int64()),
+        ("media_type", category),
+        ("title_romaji", string),
+        ("title_english", string),
+        ("title_native", string),
+        ("synonyms", pa.list_(string)),
+        ("description", string),
+        ("cover_image", string),
+        ("banner_image", string),
+        ("genres", pa.list_(category)),
+        ("tags", pa.list_(string)),
+        ("studios", pa.list_(string)),
+        ("score_average", int32),
+        ("score_mean", int32),
+        ("popularity", int32),
+        ("favourites", int32),
+        ("info_format", category),
+        ("info_source", category),
+        ("info_country_origin", category),
+        ("info_season", category),
+        ("info_status", category),
+        ("start_date", pa.date32()),
+        ("end_date", pa.date32()),
+        ("episodes", int32),
+        ("duration", int32),
+        ("chapters", int32),
+        ("volumes", int32),
+        ("next_episode", int32),
+        ("next_episode_airing_at", pa.timestamp("s", tz="UTC")),
+        ("is_adult", pa.bool_()),
+        ("site_url", string),
+        ("updated_at", pa.timestamp("s", tz="UTC")),
+    ]
+
+
+COLUMN_GETTERS: Tuple[Tuple[str, Callable[[AnilistMedia], Any]], ...] = (
+    ("id", lambda media: media.id),
+    ("id_mal", lambda media: media.idMal),
+    ("media_type", _enum(lambda media: media.media_type)),
+    ("title_romaji", _nested("title", "romaji")),
+    ("title_english", _nested("title", "english")),
+    ("title_native", _nested("title", "native")),
+    ("synonyms", lambda media: media.synonyms),
+    ("description", lambda media: media.description),
+    ("cover_image", _cover_image),
+    ("banner_image", lambda media: media.bannerImage),
+    ("genres", _genres),
+    ("tags", _names("tags")),
+    ("studios", _names("studios")),
+    ("score_average", _nested("score", "average_score")),
+    ("score_mean", _nested("score", "mean_score")),
+    ("popularity", _nested("score", "popularity")),
+    ("favourites", _nested("score", "favourites")),
+    ("info_format", _enum(_nested("info", "format"))),
+    ("info_source", _enum(_nested("info", "source"))),
+    ("info_country_origin", _nested("info", "country_origin")),
+    ("info_season", _enum(_nested("info", "season"))),
+    ("info_status", _enum(_nested("info", "status"))),
+    ("start_date", _date("startDate")),
+    ("end_date", _date("endDate")),
+    ("episodes", lambda media: media.episodes),
+    ("duration", lambda media: media.duration),
+    ("chapters", lambda media: media.chapters),
+    ("volumes", lambda media: media.volumes),
+    ("next_episode", lambda media: media.next_episode),
+    ("next_episode_airing_at", lambda media: media.next_episode_airing_at),
+    ("is_adult", lambda media: media.isAdult),
+    ("site_url", lambda media: media.siteUrl),
+    ("updated_at", lambda media: media.updatedAt),
+)
+
+_SCHEMA = None
+
+
+def media_schema() -> "pa.Schema":
+    """Arrow schema of the exported media, one column per `COLUMN_GETTERS` entry."""
+    global _SCHEMA
+    _require_pyarrow()
+    if _SCHEMA is None:
+        _SCHEMA = pa.schema(_column_types())
+    return _SCHEMA
+
+
+def media_to_record_batch(medias: Iterable[Optional[AnilistMedia]]) -> "pa.RecordBatch":
+    """
+    One record batch of `medias`, parsed or lazy. Each column is collected in a single pass over its
+    attribute and converted by Arrow at once, fields that were not queried are null.
+    """
+    schema = media_schema()
+    medias = [media for media in medias if media is not None]
+    arrays = [pa.array([getter(media) for media in medias], type=column.type)
+              for (_, getter), column in zip(COLUMN_GETTERS, schema)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class MediaParquetWriter:
+    """
+    Streaming Parquet writer of media pages.
+
+    Pages are buffered until `row_group_size` rows are collected and then written as one row group, so memory
+    stays bounded by a row group no matter how large the catalog is:
+
+        with MediaParquetWriter("anime.parquet") as writer:
+            async for page in client.crawl_search(MediaType.ANIME, builder):
+                writer.write_page(page)
+    """
+
+    def __init__(self, path: Union[str, Path], row_group_size: int = 10_000, compression: str = "zstd"):
+        _require_pyarrow()
+        self.path = Path(path)
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = pq.ParquetWriter(self.path, media_schema(), compression=compression)
+        self._buffer: List["pa.RecordBatch"] = []
+        self._buffered_rows = 0
+
+    def write(self, medias: Iterable[Optional[AnilistMedia]]):
+        batch = media_to_record_batch(medias)
+        if batch.num_rows == 0:
+            return
+        self._buffer.append(batch)
+        self._buffered_rows += batch.num_rows
+        if self._buffered_rows >= self.row_group_size:
+            self.flush()
+
+    def write_page(self, page: AnilistSearchResult):
+        self.write(page.medias)
+
+    async def write_pages(self, pages: AsyncIterable[AnilistSearchResult]) -> int:
+        """Write every page of e.g. `crawl_search`, returns the number of rows written."""
+        async for page in pages:
+            self.write_page(page)
+        self.flush()
+        return self.rows_written
+
+    def flush(self):
+        if not self._buffer:
+            return
+        # the whole buffer is one row group, a bit over row_group_size rather than a small remainder group
+        self._writer.write_table(pa.Table.from_batches(self._buffer), row_group_size=self._buffered_rows)
+        self.rows_written += self._buffered_rows
+        self._buffer.clear()
+        self._buffered_rows = 0
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+        logger.debug(f"Wrote {self.rows_written} media to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,10 @@
+from typing import TYPE_CHECKING
+
+from AnillistPython.utils.lazy_import import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    ".media_index": ["MediaIndex", "IndexedMedia", "to_indexed_media"],
+})
+
+if TYPE_CHECKING:
+    from .media_index import MediaIndex, IndexedMedia, to_indexed_media
@@ -0,0 +1,541 @@
+import heapq
+import sqlite3
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+from loguru import logger
+
+from AnillistPython.models import (AnilistMedia, AnilistTitle, MediaType, MediaFormat, MediaStatus, MediaSource,
+                                   MediaSeason, MediaGenre)
+from AnillistPython.queries import SearchQueryBuilder
+from AnillistPython.index.text import normalize, tokenize, trigrams, within_distance
+from AnillistPython.utils import fastjson
+
+# relevance of a query token matching a title term
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.75
+FUZZY_WEIGHT = 0.5
+# extra relevance when the whole query starts a title or synonym
+TITLE_PREFIX_BONUS = 1.0
+# upper bound of vocabulary terms a prefix or typo expands to
+MAX_EXPANSIONS = 256
+
+
+@dataclass(slots=True)
+class IndexedMedia:
+    """The part of an `AnilistMedia` kept by `MediaIndex`, enough to show and filter search suggestions."""
+    id: int
+    title: Optional[AnilistTitle] = None
+    synonyms: Optional[List[str]] = None
+    media_type: Optional[MediaType] = None
+    format: Optional[MediaFormat] = None
+    status: Optional[MediaStatus] = None
+    source: Optional[MediaSource] = None
+    season: Optional[MediaSeason] = None
+    season_year: Optional[int] = None
+    start_date: Optional[int] = None  # FuzzyDateInt, YYYYMMDD
+    end_date: Optional[int] = None
+    genres: Optional[List[MediaGenre]] = None
+    tags: Optional[List[str]] = None
+    average_score: Optional[int] = None
+    popularity: Optional[int] = None
+    favourites: Optional[int] = None
+    episodes: Optional[int] = None
+    duration: Optional[int] = None
+    chapters: Optional[int] = None
+    volumes: Optional[int] = None
+    is_adult: Optional[bool] = None
+    cover_image: Optional[str] = None
+    updated_at: Optional[int] = None
+
+
+def _fuzzy_date(date: Optional[datetime]) -> Optional[int]:
+    return date.year * 10000 + date.month * 100 + date.day if date else None
+
+
+def _value(member) -> Optional[str]:
+    return member.value if member is not None else None
+
+
+def to_indexed_media(media: AnilistMedia) -> IndexedMedia:
+    """Index record of a parsed (or lazy) media, fields that were not queried stay None."""
+    info, score, start = media.info, media.score, media.startDate
+    season = info.season if info else None
+    season_year = None
+    if season is not None and start is not None:
+        # AniList counts December into the next year's winter season
+        season_year = start.year + 1 if season == MediaSeason.WINTER and start.month == 12 else start.year
+    cover = media.coverImage
+    return IndexedMedia(
+        id=media.id,
+        title=media.title,
+        synonyms=list(media.synonyms) if media.synonyms else None,
+        media_type=media.media_type,
+        format=info.format if info else None,
+        status=info.status if info else None,
+        source=info.source if info else None,
+        season=season,
+        season_year=season_year,
+        start_date=_fuzzy_date(start),
+        end_date=_fuzzy_date(media.endDate),
+        genres=[genre for genre in media.genres if genre is not None] if media.genres else None,
+        tags=[tag.name for tag in media.tags if tag and tag.name] if media.tags else None,
+        average_score=score.average_score if score else None,
+        popularity=score.popularity if score else None,
+        favourites=score.favourites if score else None,
+        episodes=media.episodes,
+        duration=media.duration,
+        chapters=media.chapters,
+        volumes=media.volumes,
+        is_adult=media.isAdult,
+        cover_image=(cover.large or cover.medium or cover.extraLarge) if cover else None,
+        updated_at=media.updatedAt,
+    )
+
+
+def _encode(record: IndexedMedia) -> bytes:
+    title = record.title
+    return fastjson.dumps({
+        "id": record.id,
+        "title": [title.romaji, title.english, title.native] if title else None,
+        "synonyms": record.synonyms,
+        "type": _value(record.media_type),
+        "format": _value(record.format),
+        "status": _value(record.status),
+        "source": _value(record.source),
+        "season": _value(record.season),
+        "seasonYear": record.season_year,
+        "startDate": record.start_date,
+        "endDate": record.end_date,
+        "genres": [genre.value for genre in record.genres] if record.genres is not None else None,
+        "tags": record.tags,
+        "averageScore": record.average_score,
+        "popularity": record.popularity,
+        "favourites": record.favourites,
+        "episodes": record.episodes,
+        "duration": record.duration,
+        "chapters": record.chapters,
+        "volumes": record.volumes,
+        "isAdult": record.is_adult,
+        "coverImage": record.cover_image,
+        "updatedAt": record.updated_at,
+    })
+
+
+def _decode(data: bytes) -> IndexedMedia:
+    doc = fastjson.loads(data)
+    title = doc["title"]
+    genres = doc["genres"]
+    return IndexedMedia(
+        id=doc["id"],
+        title=AnilistTitle(*title) if title else None,
+        synonyms=doc["synonyms"],
+        media_type=MediaType.from_str(doc["type"]),
+        format=MediaFormat.from_str(doc["format"]),
+        status=MediaStatus.from_str(doc["status"]),
+        source=MediaSource.from_str(doc["source"]),
+        season=MediaSeason.from_str(doc["season"]),
+        season_year=doc["seasonYear"],
+        start_date=doc["startDate"],
+        end_date=doc["endDate"],
+        genres=[genre for genre in map(MediaGenre.from_str, genres) if genre] if genres is not None else None,
+        tags=doc["tags"],
+        average_score=doc["averageScore"],
+        popularity=doc["popularity"],
+        favourites=doc["favourites"],
+        episodes=doc["episodes"],
+        duration=doc["duration"],
+        chapters=doc["chapters"],
+        volumes=doc["volumes"],
+        is_adult=doc["isAdult"],
+        cover_image=doc["coverImage"],
+        updated_at=doc.get("updatedAt"),
+    )
+
+
+def _title_names(record: IndexedMedia) -> List[str]:
+    title = record.title
+    names = [title.romaji, title.english, title.native] if title else []
+    return [name for name in names + (record.synonyms or []) if name]
+
+
+def _facet(name: str, value: Any) -> str:
+    # title terms are \w+ runs, so they never contain the ":" of a facet term
+    return f"{name}:{value}"
+
+
+def _terms(record: IndexedMedia) -> Set[str]:
+    terms = {term for name in _title_names(record) for term in tokenize(name)}
+    for name, value in (("type", record.media_type), ("format", record.format), ("status", record.status),
+                        ("source", record.source), ("season", record.season)):
+        if value is not None:
+            terms.add(_facet(name, value.value))
+    if record.season_year is not None:
+        terms.add(_facet("seasonYear", record.season_year))
+    terms.update(_facet("genre", genre.value) for genre in record.genres or ())
+    terms.update(_facet("tag", tag) for tag in record.tags or ())
+    return terms
+
+
+# SearchQueryBuilder filter name -> (facet, combine): "any" keeps media with one of the values, "all" media with
+# every value (AniList's genre_in/tag_in semantics) and "none" drops media with one of them
+_FACET_FILTERS: Dict[str, Tuple[str, str]] = {
+    "type": ("type", "any"),
+    "format_in": ("format", "any"),
+    "format_not_in": ("format", "none"),
+    "status_in": ("status", "any"),
+    "status_not_in": ("status", "none"),
+    "source_in": ("source", "any"),
+    "season": ("season", "any"),
+    "seasonYear": ("seasonYear", "any"),
+    "genre_in": ("genre", "all"),
+    "genre_not_in": ("genre", "none"),
+    "tag_in": ("tag", "all"),
+    "tag_not_in": ("tag", "none"),
+}
+
+# range filters are strict comparisons, media without the value never match
+_RANGE_FILTERS: Dict[str, Tuple[str, Callable[[int, int], bool]]] = {
+    "averageScore_greater": ("average_score", int.__gt__),
+    "averageScore_lesser": ("average_score", int.__lt__),
+    "episodes_greater": ("episodes", int.__gt__),
+    "episodes_lesser": ("episodes", int.__lt__),
+    "duration_greater": ("duration", int.__gt__),
+    "duration_lesser": ("duration", int.__lt__),
+    "chapters_greater": ("chapters", int.__gt__),
+    "chapters_lesser": ("chapters", int.__lt__),
+    "startDate_greater": ("start_date", int.__gt__),
+    "startDate_lesser": ("start_date", int.__lt__),
+}
+
+
+def _enum_key(attribute: str) -> Callable[[IndexedMedia], Optional[str]]:
+    return lambda record: _value(getattr(record, attribute))
+
+
+def _title_key(attribute: str) -> Callable[[IndexedMedia], Optional[str]]:
+    return lambda record: normalize(getattr(record.title, attribute) or "") or None if record.title else None
+
+
+# MediaSort value without the _DESC suffix -> sort key, TRENDING and UPDATED_AT are not kept in the index
+_SORT_KEYS: Dict[str, Callable[[IndexedMedia], Any]] = {
+    "ID": lambda record: record.id,
+    "TITLE_ROMAJI": _title_key("romaji"),
+    "TITLE_ENGLISH": _title_key("english"),
+    "TITLE_NATIVE": _title_key("native"),
+    "TYPE": _enum_key("media_type"),
+    "FORMAT": _enum_key("format"),
+    "STATUS": _enum_key("status"),
+    "START_DATE": lambda record: record.start_date,
+    "END_DATE": lambda record: record.end_date,
+    "SCORE": lambda record: record.average_score,
+    "POPULARITY": lambda record: record.popularity,
+    "FAVOURITES": lambda record: record.favourites,
+    "EPISODES": lambda record: record.episodes,
+    "DURATION": lambda record: record.duration,
+    "CHAPTERS": lambda record: record.chapters,
+    "VOLUMES": lambda record: record.volumes,
+}
+
+
+class MediaIndex:
+    """
+    On-disk inverted index of media titles for local search and autocomplete.
+
+    Titles (romaji, english, native) and synonyms are split into terms, genres, tags, type, format, status,
+    source and season are stored as facet terms. The postings live in SQLite and are loaded into memory on
+    open, so `search` answers without touching the disk or the network:
+
+        index = MediaIndex("anilist_index.sqlite")
+        index.add_many(result.medias)
+        index.search("shingeki no kyo", SearchQueryBuilder().set_formats([MediaFormat.TV]))
+
+    The last query token matches as a prefix, tokens without a match fall back to terms within a small edit
+    distance. Filters are evaluated like the `SearchQueryBuilder` filters of the API, fields the indexed media
+    were not queried with count as missing.
+    """
+
+    def __init__(self, path: Union[str, Path] = "anilist_index.sqlite"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS media (
+                id INTEGER PRIMARY KEY,
+                doc BLOB NOT NULL,
+                indexed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                media_id INTEGER NOT NULL,
+                PRIMARY KEY (term, media_id)
+            ) WITHOUT ROWID"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS postings_media_id ON postings (media_id)")
+
+        self._records: Dict[int, IndexedMedia] = {}
+        self._names: Dict[int, Tuple[str, ...]] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        # derived from the postings on first use and dropped when a write adds new terms
+        self._vocabulary: Optional[List[str]] = None
+        self._trigram_index: Optional[Dict[str, Set[str]]] = None
+        self._load()
+
+    def _load(self):
+        started = time.perf_counter()
+        for media_id, doc in self._conn.execute("SELECT id, doc FROM media"):
+            self._remember(_decode(doc))
+        for term, media_id in self._conn.execute("SELECT term, media_id FROM postings"):
+            self._postings[term].add(media_id)
+        if self._records:
+            logger.debug(f"Loaded {len(self._records)} indexed media in {time.perf_counter() - started:.3f}s")
+
+    def _remember(self, record: IndexedMedia):
+        self._records[record.id] = record
+        self._names[record.id] = tuple(normalize(name) for name in _title_names(record))
+
+    def add(self, media: AnilistMedia):
+        self.add_many((media,))
+
+    def add_many(self, medias: Iterable[Optional[AnilistMedia]]) -> int:
+        """Index or re-index `medias` (parsed or lazy), returns the number of media written."""
+        records = [to_indexed_media(media) for media in medias if media is not None and media.id is not None]
+        if not records:
+            return 0
+        now = time.time()
+        with self._transaction():
+            for record in records:
+                self._unlink(record.id)
+                terms = _terms(record)
+                self._conn.execute("INSERT INTO media (id, doc, indexed_at) VALUES (?, ?, ?)",
+                                   (record.id, _encode(record), now))
+                self._conn.executemany("INSERT INTO postings (term, media_id) VALUES (?, ?)",
+                                       [(term, record.id) for term in terms])
+                self._link(record, terms)
+        return len(records)
+
+    def remove(self, media_id: int) -> bool:
+        if media_id not in self._records:
+            return False
+        with self._transaction():
+            self._unlink(media_id)
+        return True
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        self._conn.execute("BEGIN")
+        try:
+            yield
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            # the memory side may be ahead of the rolled back rows, reload it from disk
+            self._reload()
+            raise
+
+    def _unlink(self, media_id: int):
+        record = self._records.pop(media_id, None)
+        if record is None:
+            return
+        del self._names[media_id]
+        for term in _terms(record):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.discard(media_id)
+                if not postings:
+                    del self._postings[term]
+                    self._vocabulary = self._trigram_index = None
+        self._conn.execute("DELETE FROM media WHERE id = ?", (media_id,))
+        self._conn.execute("DELETE FROM postings WHERE media_id = ?", (media_id,))
+
+    def _link(self, record: IndexedMedia, terms: Set[str]):
+        self._remember(record)
+        for term in terms:
+            if term not in self._postings:
+                self._vocabulary = self._trigram_index = None
+            self._postings[term].add(record.id)
+
+    def _reload(self):
+        self._records.clear()
+        self._names.clear()
+        self._postings.clear()
+        self._vocabulary = self._trigram_index = None
+        self._load()
+
+    def get(self, media_id: int) -> Optional[IndexedMedia]:
+        return self._records.get(media_id)
+
+    def search(self, query: Optional[str] = None, filters: Optional[SearchQueryBuilder] = None, limit: int = 10,
+               prefix: bool = True, fuzzy: bool = True) -> List[IndexedMedia]:
+        """
+        Media matching every token of `query` and the `filters`, best matches first.
+
+        Without a sort filter results are ranked by relevance and then popularity, without a query by
+        popularity. The search text and page variables of `filters` are ignored, pass the text as `query`.
+
+        :param prefix: match the last token as a prefix, for autocomplete
+        :param fuzzy: let tokens without an exact or prefix match match terms within a small edit distance
+        """
+        scores = self._match_query(query, prefix, fuzzy) if query else None
+        candidates = set(scores) if scores is not None else None
+        sort: Tuple[str, ...] = ()
+        for name, value in (filters.filters if filters is not None else ()):
+            if name == "sort":
+                sort = value
+            else:
+                candidates = self._apply_filter(name, value, candidates)
+
+        if candidates is None:
+            candidates = set(self._records)
+        records = [self._records[media_id] for media_id in candidates]
+        if sort and sort != ("SEARCH_MATCH",):
+            return self._sorted(records, sort)[:limit]
+        if scores is None:
+            return heapq.nsmallest(limit, records, key=lambda record: (-(record.popularity or 0), record.id))
+        return heapq.nsmallest(limit, records,
+                               key=lambda record: (-scores[record.id], -(record.popularity or 0), record.id))
+
+    def autocomplete(self, text: str, limit: int = 10,
+                     filters: Optional[SearchQueryBuilder] = None) -> List[IndexedMedia]:
+        return self.search(text, filters, limit)
+
+    def _match_query(self, query: str, prefix: bool, fuzzy: bool) -> Optional[Dict[int, float]]:
+        """Relevance of each media matching every token, None when the query has no tokens."""
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        scores: Optional[Dict[int, float]] = None
+        for position, token in enumerate(tokens):
+            matches: Dict[int, float] = {}
+            for term, weight in self._expand(token, prefix and position == len(tokens) - 1, fuzzy):
+                for media_id in self._postings[term]:
+                    if weight > matches.get(media_id, 0.0):
+                        matches[media_id] = weight
+            if scores is None:
+                scores = matches
+            else:
+                scores = {media_id: score + matches[media_id] for media_id, score in scores.items()
+                          if media_id in matches}
+            if not scores:
+                return {}
+
+        phrase = " ".join(tokens)
+        for media_id in scores:
+            if any(name.startswith(phrase) for name in self._names[media_id]):
+                scores[media_id] += TITLE_PREFIX_BONUS
+        return scores
+
+    def _expand(self, token: str, prefix: bool, fuzzy: bool) -> List[Tuple[str, float]]:
+        """Vocabulary terms `token` matches with their relevance."""
+        expansions = []
+        if token in self._postings:
+            expansions.append((token, EXACT_WEIGHT))
+        if prefix:
+            vocabulary = self._get_vocabulary()
+            position = bisect_left(vocabulary, token)
+            while position < len(vocabulary) and len(expansions) < MAX_EXPANSIONS:
+                term = vocabulary[position]
+                if not term.startswith(token):
+                    break
+                if term != token:
+                    expansions.append((term, PREFIX_WEIGHT))
+                position += 1
+        if expansions or not fuzzy or len(token) < 3:
+            return expansions
+
+        max_distance = 1 if len(token) <= 5 else 2
+        trigram_index = self._get_trigram_index()
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in trigrams(token):
+            for term in trigram_index.get(gram, ()):
+                shared[term] += 1
+        # terms sharing the most trigrams first, they are the likely typo fixes
+        for term in sorted(shared, key=shared.__getitem__, reverse=True)[:MAX_EXPANSIONS]:
+            if within_distance(token, term, max_distance):
+                expansions.append((term, FUZZY_WEIGHT))
+            elif prefix and within_distance(token, term[:len(token)], max_distance):
+                expansions.append((term, FUZZY_WEIGHT * PREFIX_WEIGHT))
+        return expansions
+
+    def _get_vocabulary(self) -> List[str]:
+        if self._vocabulary is None:
+            self._vocabulary = sorted(term for term in self._postings if ":" not in term)
+        return self._vocabulary
+
+    def _get_trigram_index(self) -> Dict[str, Set[str]]:
+        if self._trigram_index is None:
+            trigram_index: Dict[str, Set[str]] = defaultdict(set)
+            for term in self._get_vocabulary():
+                for gram in trigrams(term):
+                    trigram_index[gram].add(term)
+            self._trigram_index = trigram_index
+        return self._trigram_index
+
+    def _apply_filter(self, name: str, value: Any, candidates: Optional[Set[int]]) -> Set[int]:
+        if name in _FACET_FILTERS:
+            facet, combine = _FACET_FILTERS[name]
+            values = value if isinstance(value, tuple) else (value,)
+            postings = [self._postings.get(_facet(facet, item), set()) for item in values]
+            if combine == "none":
+                excluded = set().union(*postings)
+                return (candidates if candidates is not None else set(self._records)) - excluded
+            matching = set.intersection(*postings) if combine == "all" else set().union(*postings)
+            return matching if candidates is None else candidates & matching
+
+        if name in _RANGE_FILTERS:
+            attribute, compare = _RANGE_FILTERS[name]
+            predicate = lambda record: (getattr(record, attribute) is not None
+                                        and compare(getattr(record, attribute), value))
+        elif name == "isAdult":
+            predicate = lambda record: record.is_adult is value
+        else:
+            raise ValueError(f"Filter {name!r} is not supported by the local index")
+        records = self._records
+        return {media_id for media_id in (candidates if candidates is not None else records)
+                if predicate(records[media_id])}
+
+    @staticmethod
+    def _sorted(records: List[IndexedMedia], sort: Tuple[str, ...]) -> List[IndexedMedia]:
+        # stable sorts from the last key to the first, missing values last in either direction
+        records = sorted(records, key=lambda record: record.id)
+        for sort_value in reversed(sort):
+            descending = sort_value.endswith("_DESC")
+            key = _SORT_KEYS.get(sort_value.removesuffix("_DESC"))
+            if key is None:
+                raise ValueError(f"Sort {sort_value!r} is not supported by the local index")
+            present = [record for record in records if key(record) is not None]
+            missing = [record for record in records if key(record) is None]
+            records = sorted(present, key=key, reverse=descending) + missing
+        return records
+
+    def clear(self):
+        with self._transaction():
+            self._conn.execute("DELETE FROM media")
+            self._conn.execute("DELETE FROM postings")
+        self._records.clear()
+        self._names.clear()
+        self._postings.clear()
+        self._vocabulary = self._trigram_index = None
+
+    def close(self):
+        self._conn.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {"media": len(self._records), "terms": len(self._postings),
+                "postings": sum(len(postings) for postings in self._postings.values())}
+
+    def __contains__(self, media_id: int) -> bool:
+        return media_id in self._records
+
+    def __len__(self):
+        return len(self._records)
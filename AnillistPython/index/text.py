@@ -0,0 +1,38 @@
+import re
+import unicodedata
+from typing import List, Optional, Set
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Casefolded text without accents, so "Pokémon" and "pokemon" match."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return _WORD.findall(normalize(text))
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def within_distance(a: str, b: str, max_distance: int) -> bool:
+    """Whether the Levenshtein distance of `a` and `b` is at most `max_distance`."""
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        # every later row is at least the minimum of this one
+        if min(current) > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
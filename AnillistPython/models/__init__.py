@@ -1,5 +1,19 @@
-from .enums import *
-from .media import (AnilistMedia, AnilistRelation, AnilistRecommendation, AnilistScore, AnilistMediaInfo,
-                    MediaCoverImage, AnilistMediaCharacter, AnilistMediaBase, AnilistEpisode, AnilistPageInfo,
-                    AnilistSearchResult)
-from .common import AnilistTag, AnilistTitle, AnilistCharacter, AnilistStudio
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from AnillistPython.utils.lazy_import import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    ".enums": ["MyStrEnum", "MediaType", "MediaFormat", "MediaStatus", "MediaSeason", "MediaSource", "CharacterRole",
+               "MediaRelation", "MediaSort", "MediaGenre"],
+    ".media": ["AnilistMedia", "AnilistRelation", "AnilistRecommendation", "AnilistScore", "AnilistMediaInfo",
+               "MediaCoverImage", "AnilistMediaCharacter", "AnilistMediaBase", "AnilistEpisode", "AnilistPageInfo",
+               "AnilistSearchResult", "AnilistMediaBatch"],
+    ".common": ["AnilistTag", "AnilistTitle", "AnilistCharacter", "AnilistStudio"],
+})
+
+if TYPE_CHECKING:
+    from .enums import *
+    from .media import (AnilistMedia, AnilistRelation, AnilistRecommendation, AnilistScore, AnilistMediaInfo,
+                        MediaCoverImage, AnilistMediaCharacter, AnilistMediaBase, AnilistEpisode, AnilistPageInfo,
+                        AnilistSearchResult, AnilistMediaBatch)
+    from .common import AnilistTag, AnilistTitle, AnilistCharacter, AnilistStudio
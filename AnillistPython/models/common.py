@@ -3,14 +3,14 @@ from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class AnilistTitle:
     romaji: Optional[str] = None
     english: Optional[str] = None
     native: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AnilistCharacter:
     id: int
     name: Optional[AnilistTitle] = None
@@ -19,7 +19,7 @@ class AnilistCharacter:
     dob: Optional[datetime] = None
     description: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class AnilistTag:
     id: int
     name: Optional[str] = None
@@ -27,7 +27,7 @@ class AnilistTag:
     category: Optional[str] = None
     isAdult: Optional[bool] = None
 
-@dataclass
+@dataclass(slots=True)
 class AnilistStudio:
     id: int
     name: str
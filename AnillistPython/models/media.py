@@ -8,7 +8,7 @@ from AnillistPython.models.enums import (MediaType, MediaFormat, MediaSeason, Me
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class MediaCoverImage:
     """
     The cover image url of the media at its largest size. If this size isn't available, large will be provided instead.
@@ -26,7 +26,7 @@ class MediaCoverImage:
 
 
 
-@dataclass
+@dataclass(slots=True)
 class AnilistScore:
     id: int #media id
     popularity: Optional[int] = None
@@ -34,7 +34,7 @@ class AnilistScore:
     average_score: Optional[int] = None
     mean_score: Optional[int] = None
 
-@dataclass
+@dataclass(slots=True)
 class AnilistMediaInfo:
     id: int #media id
     format: Optional[MediaFormat] = None
@@ -43,19 +43,19 @@ class AnilistMediaInfo:
     season: Optional[MediaSeason] = None
     status: Optional[MediaStatus] = None
 
-@dataclass
+@dataclass(slots=True)
 class AnilistMediaCharacter(AnilistCharacter):
     media_id: int = None
     role: Optional[CharacterRole] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AnilistMediaTrailer:
     video_id: str = None
     site: Optional[str] = None
     thumbnail: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class AnilistMediaBase:
     id: int
     title: Optional[AnilistTitle] = None
@@ -87,32 +87,33 @@ class AnilistMediaBase:
     trailer: Optional[AnilistMediaTrailer] = None
     siteUrl: Optional[str] = None
     idMal: Optional[int] = None
+    updatedAt: Optional[int] = None  # unix timestamp of the last change on AniList
     # todo: update query builder, parser for bellow data
-    media_type: Optional[MediaType] = None,
+    media_type: Optional[MediaType] = None
 
-    next_episode: Optional[int] = None,
-    next_episode_airing_at: Optional[int] = None,
+    next_episode: Optional[int] = None
+    next_episode_airing_at: Optional[int] = None
     time_until_next_episode: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AnilistRelation:
     from_media_id: int  # current media
     relation_type: Optional[MediaRelation] = None  # e.g. PREQUEL, SEQUEL
     media: Optional[AnilistMediaBase] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AnilistRecommendation:
     from_media_id: int
     media: Optional[AnilistMediaBase] = None
 
-@dataclass
+@dataclass(slots=True)
 class AnilistMedia(AnilistMediaBase):
     relations: Optional[List[AnilistRelation]] = None
     recommendations: Optional[List[AnilistRecommendation]] = None
 
-@dataclass
+@dataclass(slots=True)
 class AnilistEpisode:
     media_id: id
     title: str
@@ -120,14 +121,43 @@ class AnilistEpisode:
     official_url: str
     official_site: str
 
-@dataclass
+@dataclass(slots=True)
 class AnilistPageInfo:
     total: int
     currentPage: int
     lastPage: int
     hasNextPage: bool
 
-@dataclass
+@dataclass(slots=True)
 class AnilistSearchResult:
     pageInfo: AnilistPageInfo
-    medias: List[AnilistMedia]
\ No newline at end of file
+    medias: List[AnilistMedia]
+
+@dataclass(slots=True)
+class AnilistMediaBatch:
+    medias: List[Optional[AnilistMedia]]  # same order as the requested ids, None for misses
+    missing: List[int]
+
+
+if __name__ == "__main__":
+    import tracemalloc
+    from dataclasses import fields, field, make_dataclass
+
+    def without_slots(cls):
+        # same fields as `cls`, but instances carry a __dict__
+        return make_dataclass(f"{cls.__name__}WithDict", [(f.name, f.type, field(default=None)) for f in fields(cls)])
+
+    def bytes_per_object(cls, count: int = 20_000) -> float:
+        kwargs = lambda i: {"id": i} if any(f.name == "id" for f in fields(cls)) else {}
+        tracemalloc.start()
+        objects = [cls(**kwargs(i)) for i in range(count)]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del objects
+        return size / count
+
+    print(f"{'model':<20} {'__dict__':>10} {'slots':>10} {'saved':>8}")
+    for model in (AnilistMedia, AnilistScore, AnilistMediaInfo, MediaCoverImage, AnilistTitle):
+        dict_size = bytes_per_object(without_slots(model))
+        slots_size = bytes_per_object(model)
+        print(f"{model.__name__:<20} {dict_size:>9.0f}B {slots_size:>9.0f}B {1 - slots_size / dict_size:>7.0%}")
@@ -1,3 +1,20 @@
-from .media import parse_media, parse_recommendation, parse_relation, parse_graphql_media_data, parse_episode
-from .search_parser import parse_searched_media
-from .common import parse_page_info
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from AnillistPython.utils.lazy_import import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    ".media": ["parse_media", "parse_recommendation", "parse_relation", "parse_graphql_media_data", "parse_episode",
+               "compile_parse_plan", "MediaParsePlan"],
+    ".search_parser": ["parse_searched_media"],
+    ".lazy": ["LazyAnilistMedia"],
+    ".common": ["parse_page_info"],
+    ".columns": ["parse_media_columns"],
+})
+
+if TYPE_CHECKING:
+    from .media import parse_media, parse_recommendation, parse_relation, parse_graphql_media_data, parse_episode, \
+        compile_parse_plan, MediaParsePlan
+    from .search_parser import parse_searched_media
+    from .lazy import LazyAnilistMedia
+    from .common import parse_page_info
+    from .columns import parse_media_columns
@@ -0,0 +1,130 @@
+"""
+Column-wise parsing of scalar media fields straight from raw responses, without building `AnilistMedia`.
+
+Needs numpy, and pyarrow for `backend="arrow"` (`pip install AnilistPython[arrow]`).
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+# column name -> (path in the media dict, kind), dotted names select a field of a nested object. Values are
+# taken as sent, e.g. `episodes` is not filled from nextAiringEpisode like parse_media does
+COLUMN_FIELDS: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    "id": (("id",), "int64"),
+    "idMal": (("idMal",), "int64"),
+    "averageScore": (("averageScore",), "int32"),
+    "meanScore": (("meanScore",), "int32"),
+    "popularity": (("popularity",), "int32"),
+    "favourites": (("favourites",), "int32"),
+    "episodes": (("episodes",), "int32"),
+    "duration": (("duration",), "int32"),
+    "chapters": (("chapters",), "int32"),
+    "volumes": (("volumes",), "int32"),
+    "isAdult": (("isAdult",), "bool"),
+    "updatedAt": (("updatedAt",), "timestamp"),
+    "startDate": (("startDate",), "date"),
+    "endDate": (("endDate",), "date"),
+    "nextAiringEpisode.episode": (("nextAiringEpisode", "episode"), "int32"),
+    "nextAiringEpisode.airingAt": (("nextAiringEpisode", "airingAt"), "timestamp"),
+    "nextAiringEpisode.timeUntilAiring": (("nextAiringEpisode", "timeUntilAiring"), "int32"),
+}
+
+DEFAULT_COLUMNS = ("id", "averageScore", "meanScore", "popularity", "favourites", "episodes", "duration",
+                   "startDate", "endDate")
+
+
+def _page_medias(page: Union[Dict[str, Any], List[Optional[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    if isinstance(page, list):
+        medias = page
+    else:
+        page = page.get("data", page)
+        medias = (page.get("Page") or {}).get("media") or []
+    return [media for media in medias if media]
+
+
+def _getter(path: Tuple[str, ...]) -> Callable[[Dict[str, Any]], Any]:
+    if len(path) == 1:
+        key = path[0]
+        return lambda media: media.get(key)
+    outer, inner = path
+
+    def get(media: Dict[str, Any]) -> Any:
+        value = media.get(outer)
+        return value.get(inner) if value else None
+    return get
+
+
+def _numbers(values: List[Any], dtype: str) -> Tuple["np.ndarray", "np.ndarray"]:
+    count = len(values)
+    mask = np.fromiter((value is None for value in values), bool, count)
+    data = np.fromiter((0 if value is None else value for value in values), dtype, count)
+    return data, mask
+
+
+def _dates(dates: List[Optional[Dict[str, Any]]]) -> Tuple["np.ndarray", "np.ndarray"]:
+    # FuzzyDate parts, a missing month or day counts as the first one
+    years, mask = _numbers([date.get("year") if date else None for date in dates], "int64")
+    months, _ = _numbers([(date.get("month") or 1) if date else 1 for date in dates], "int64")
+    days, _ = _numbers([(date.get("day") or 1) if date else 1 for date in dates], "int64")
+    data = ((years - 1970).astype("datetime64[Y]").astype("datetime64[M]") + (months - 1).astype("timedelta64[M]")
+            ).astype("datetime64[D]") + (days - 1).astype("timedelta64[D]")
+    return data, mask
+
+
+def _to_arrow(data: "np.ndarray", mask: "np.ndarray", kind: str) -> "pa.Array":
+    if kind == "timestamp":
+        return pa.array(data.astype("datetime64[s]"), mask=mask).cast(pa.timestamp("s", tz="UTC"))
+    array = pa.array(data, mask=mask)
+    return array.cast(pa.date32()) if kind == "date" else array
+
+
+def parse_media_columns(pages: Iterable[Union[Dict[str, Any], List[Optional[Dict[str, Any]]]]],
+                        fields: Optional[Iterable[str]] = None,
+                        backend: str = "numpy") -> Dict[str, Any]:
+    """
+    Extract scalar fields of every media in `pages` into one typed array per field.
+
+    A page is a search response as returned by `AniListClient.fetch` (`{"Page": {"media": [...]}}`, optionally
+    wrapped in `data`) or a plain list of media dicts. Fields are the `COLUMN_FIELDS` names, missing values are
+    masked. Dates become `datetime64[D]` and timestamps `datetime64[s]`.
+
+        columns = parse_media_columns(pages, ["id", "averageScore", "startDate"])
+        columns["averageScore"].mean()
+
+    :param backend: "numpy" returns `numpy.ma.MaskedArray` columns, "arrow" `pyarrow.Array` columns with nulls
+    """
+    if np is None:
+        raise ImportError("Column parsing needs the numpy package, install it with `pip install AnilistPython[arrow]`")
+    if backend not in ("numpy", "arrow"):
+        raise ValueError(f"Unknown backend {backend!r}, expected 'numpy' or 'arrow'")
+    if backend == "arrow" and pa is None:
+        raise ImportError("The arrow backend needs the pyarrow package, install it with "
+                          "`pip install AnilistPython[arrow]`")
+    fields = tuple(fields) if fields is not None else DEFAULT_COLUMNS
+    unknown = [name for name in fields if name not in COLUMN_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown media columns: {unknown}")
+
+    medias = [media for page in pages for media in _page_medias(page)]
+    columns: Dict[str, Any] = {}
+    for name in fields:
+        path, kind = COLUMN_FIELDS[name]
+        values = list(map(_getter(path), medias))
+        if kind == "date":
+            data, mask = _dates(values)
+        elif kind == "timestamp":
+            data, mask = _numbers(values, "int64")
+            data = data.astype("datetime64[s]")
+        else:
+            data, mask = _numbers(values, kind)
+        columns[name] = np.ma.MaskedArray(data, mask) if backend == "numpy" else _to_arrow(data, mask, kind)
+    return columns
@@ -0,0 +1,52 @@
+from dataclasses import fields
+from typing import Any, Dict, Optional
+
+from AnillistPython.models import AnilistMedia, MediaType
+from AnillistPython.parser.media import MediaParsePlan, parse_media
+
+_MEDIA_FIELDS = tuple(field.name for field in fields(AnilistMedia))
+
+
+class LazyAnilistMedia:
+    """
+    Read-only stand-in for `AnilistMedia` holding the raw response.
+
+    Each attribute is parsed on first access and cached, so list views that only show titles never pay for
+    characters, relations or dates. `materialize()` returns the fully parsed `AnilistMedia`.
+    """
+    __slots__ = ("id", "_media_data", "_media_type", "_plan", "_values")
+
+    def __init__(self, media_data: Dict[str, Any], media_type: Optional[MediaType], plan: MediaParsePlan):
+        self.id = media_data.get("id")
+        self._media_data = media_data
+        self._media_type = media_type
+        self._plan = plan
+        self._values: Dict[str, Any] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes that are not slots, i.e. the AnilistMedia fields
+        if name.startswith("_") or name not in _MEDIA_FIELDS:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        values = self._values
+        if name not in values:
+            values[name] = self._plan.parse_field(name, self._media_data, self._media_type)
+        return values[name]
+
+    def materialize(self) -> AnilistMedia:
+        return parse_media(self._media_data, self._media_type, plan=self._plan)
+
+    def __dir__(self):
+        return sorted(set(object.__dir__(self)) | set(_MEDIA_FIELDS))
+
+    def __eq__(self, other):
+        if isinstance(other, LazyAnilistMedia):
+            return self._media_data == other._media_data and self._media_type == other._media_type
+        if isinstance(other, AnilistMedia):
+            return self.materialize() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        parsed = ", ".join(f"{name}={value!r}" for name, value in self._values.items())
+        return f"LazyAnilistMedia(id={self.id!r}{', ' + parsed if parsed else ''})"
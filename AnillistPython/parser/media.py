@@ -1,8 +1,9 @@
 import json
 from dataclasses import asdict
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict, Any, Set, List
+from typing import Optional, Dict, Any, Set, List, Type, Callable, Tuple, FrozenSet
 
 # from AnillistPython import MediaGenre
 from AnillistPython.models import  AnilistRelation, AnilistRecommendation, AnilistScore, MediaCoverImage, AnilistMediaCharacter, AnilistMedia, AnilistTitle, \
@@ -137,84 +138,174 @@ def parse_next_airing_episode(next_airing_episode_data: Optional[dict]):
             "timeUntilAiring": next_airing_episode_data.get('timeUntilAiring'),
             "episode": next_airing_episode_data.get('episode')}
 
+def _parse_list(items: Optional[list], parse_item: Callable[[Any, int], Any], media_id: int) -> list:
+    parsed = []
+    for item in items or []:
+        if (item_data := parse_item(item, media_id)):
+            parsed.append(item_data)
+    return parsed
+
+
+# model attributes parsed only when included, named like MediaQueryBuilderBase.included_options()
+_OPTIONAL_EXTRACTORS: Tuple[Tuple[str, Callable[[Dict[str, Any], int], Any]], ...] = (
+    ("title", lambda media_data, media_id: parse_title(media_data.get("title"))),
+    ("startDate", lambda media_data, media_id: parse_date(media_data.get("startDate"))),
+    ("endDate", lambda media_data, media_id: parse_date(media_data.get("endDate"))),
+    ("coverImage", lambda media_data, media_id: parse_cover_image(media_data.get("coverImage"))),
+    ("info", parse_media_info),
+    ("score", parse_score),
+    ("characters",
+     lambda media_data, media_id: _parse_list((media_data.get("characters") or {}).get("edges"),
+                                              parse_character, media_id)),
+    ("tags", lambda media_data, media_id: _parse_list(media_data.get("tags"), parse_tag, media_id)),
+    ("studios",
+     lambda media_data, media_id: _parse_list((media_data.get("studios") or {}).get("edges"),
+                                              parse_studio, media_id)),
+    ("trailer", lambda media_data, media_id: parse_trailer(media_data.get("trailer"))),
+)
+
+
+_OPTIONAL_FIELDS = frozenset(field for field, _ in _OPTIONAL_EXTRACTORS)
+# optional list attributes, empty rather than None when not included
+_LIST_FIELDS = frozenset({"characters", "tags", "studios"})
+# copied as is from the response
+_RAW_FIELDS = frozenset({"id", "idMal", "bannerImage", "description", "synonyms", "siteUrl", "isAdult", "duration",
+                         "chapters", "volumes", "updatedAt"})
+# derived from nextAiringEpisode, mapped to its key
+_AIRING_FIELDS = {"episodes": "episode", "next_episode": "episode", "next_episode_airing_at": "airingAt",
+                  "time_until_next_episode": "timeUntilAiring"}
+
+
+class MediaParsePlan:
+    """
+    Extractors selected once for a set of included fields and reused for every media parsed with them.
+
+    Build it with `compile_parse_plan`, e.g. `compile_parse_plan(*media_query_builder.included_options())`.
+    """
+    __slots__ = ("fields", "extractors", "empty_lists", "relation_plan", "recommendation_plan", "_extractor_map")
+
+    def __init__(self, fields: Optional[FrozenSet[str]],
+                 relation_plan: Optional["MediaParsePlan"] = None,
+                 recommendation_plan: Optional["MediaParsePlan"] = None):
+        self.fields = fields
+        self.extractors = tuple((field, extractor) for field, extractor in _OPTIONAL_EXTRACTORS
+                                if fields is None or field in fields)
+        self._extractor_map = dict(self.extractors)
+        self.empty_lists = tuple(field for field in sorted(_LIST_FIELDS) if field not in self._extractor_map)
+        self.relation_plan = relation_plan
+        self.recommendation_plan = recommendation_plan
+
+    def parse(self, media_data: Dict[str, Any], media_type: MediaType = None,
+              media_cls: Type[AnilistMediaBase] = AnilistMediaBase) -> Optional[AnilistMediaBase]:
+        media_id = media_data.get("id")
+        if not media_id:
+            return None
+
+        values = {field: extractor(media_data, media_id) for field, extractor in self.extractors}
+        for field in self.empty_lists:
+            values[field] = []
+
+        next_airing_episode_info = parse_next_airing_episode(media_data.get("nextAiringEpisode"))
+        episodes = media_data.get("episodes")
+        if not episodes:
+            episodes = next_airing_episode_info.get("episode") - 1 if next_airing_episode_info else None
+        if next_airing_episode_info:
+            values["next_episode"] = next_airing_episode_info.get("episode")
+            values["next_episode_airing_at"] = next_airing_episode_info.get("airingAt")
+            values["time_until_next_episode"] = next_airing_episode_info.get("timeUntilAiring")
+
+        get = media_data.get
+        return media_cls(
+            id=media_id,
+            idMal=get("idMal"),
+            media_type=media_type or MediaType.from_str(get("type")),
+            bannerImage=get("bannerImage"),
+            description=get("description"),
+            genres=parse_genres(get("genres")),
+            synonyms=get("synonyms"),
+            siteUrl=get("siteUrl"),
+            isAdult=get("isAdult"),
+            duration=get("duration"),
+            episodes=episodes,
+            chapters=get("chapters"),
+            volumes=get("volumes"),
+            updatedAt=get("updatedAt"),
+            **values,
+        )
+
+
+    def parse_field(self, name: str, media_data: Dict[str, Any], media_type: MediaType = None) -> Any:
+        """Parse a single `AnilistMedia` attribute, the way `parse` and `parse_media` would."""
+        media_id = media_data.get("id")
+        extractor = self._extractor_map.get(name)
+        if extractor is not None:
+            return extractor(media_data, media_id)
+        if name in _LIST_FIELDS:
+            return []
+        if name in _OPTIONAL_FIELDS:
+            return None
+        if name == "media_type":
+            return media_type or MediaType.from_str(media_data.get("type"))
+        if name == "genres":
+            return parse_genres(media_data.get("genres"))
+        if name in _AIRING_FIELDS:
+            next_airing_episode_info = parse_next_airing_episode(media_data.get("nextAiringEpisode"))
+            if name == "episodes":
+                episodes = media_data.get("episodes")
+                if not episodes:
+                    episodes = next_airing_episode_info.get("episode") - 1 if next_airing_episode_info else None
+                return episodes
+            return next_airing_episode_info.get(_AIRING_FIELDS[name]) if next_airing_episode_info else None
+        if name == "relations":
+            return _parse_relations(media_data, media_id, self.relation_plan) if self.relation_plan else []
+        if name == "recommendations":
+            if self.recommendation_plan is None:
+                return []
+            return _parse_recommendations(media_data, media_id, self.recommendation_plan)
+        if name in _RAW_FIELDS:
+            return media_data.get(name)
+        raise AttributeError(name)
+
+
+@lru_cache(maxsize=128)
+def _compile_parse_plan(media_fields: Optional[FrozenSet[str]], relation_fields: Optional[FrozenSet[str]],
+                        recommendation_fields: Optional[FrozenSet[str]]) -> MediaParsePlan:
+    relation_plan = None
+    if (media_fields is None or "relations" in media_fields) and relation_fields is not None:
+        relation_plan = MediaParsePlan(relation_fields)
+    recommendation_plan = None
+    if (media_fields is None or "recommendations" in media_fields) and recommendation_fields is not None:
+        recommendation_plan = MediaParsePlan(recommendation_fields)
+    return MediaParsePlan(media_fields, relation_plan, recommendation_plan)
+
+
+def _freeze(fields: Optional[Set[str]]) -> Optional[FrozenSet[str]]:
+    return frozenset(fields) if fields is not None else None
+
+
+def compile_parse_plan(media_fields: Optional[Set[str]] = None, relation_fields: Optional[Set[str]] = None,
+                       recommendation_fields: Optional[Set[str]] = None) -> MediaParsePlan:
+    """Parse plan for the given included fields, None parses everything. Plans are cached per field set."""
+    return _compile_parse_plan(_freeze(media_fields), _freeze(relation_fields), _freeze(recommendation_fields))
+
+
 def parse_media_base(
     media_data: Dict[str, Any],
     media_type: MediaType = None,
-    fields: Optional[Set[str]] = None
+    fields: Optional[Set[str]] = None,
+    media_cls: Type[AnilistMediaBase] = AnilistMediaBase,
+    plan: Optional[MediaParsePlan] = None
 ) -> Optional[AnilistMediaBase]:
-    media_id = media_data.get("id")
-    if not media_id:
-        return None
-
-
-    # Helper to check if a field should be included
-    include_field = lambda field: fields is None or field in fields
-
-    # Parse fields conditionally based on 'fields' set
-    title = parse_title(media_data.get("title")) if include_field("title") else None
-    start_date = parse_date(media_data.get("startDate")) if include_field("startDate") else None
-    end_date = parse_date(media_data.get("endDate")) if include_field("endDate") else None
-    image = parse_cover_image(media_data.get("coverImage")) if include_field("coverImage") else None
-    info = parse_media_info(media_data, media_id) if include_field("info") else None
-    score = parse_score(media_data, media_id) if include_field("score") else None
-
-    character_list = []
-    if (fields is None or "characters" in fields) and (characters := media_data.get("characters")):
-        for character in characters.get("edges", []):
-            if (character_data := parse_character(character, media_id)):
-                character_list.append(character_data)
-
-    tag_list = []
-    if (fields is None or "tags" in fields) and (tags := media_data.get("tags")):
-        for tag in tags:
-            if (tag_data := parse_tag(tag, media_id)):
-                tag_list.append(tag_data)
-
-    studio_list = []
-    if (fields is None or "studios" in fields) and (studios := media_data.get("studios")):
-        for studio in studios.get("edges", []):
-            if (studio_data := parse_studio(studio, media_id)):
-                studio_list.append(studio_data)
-
-    next_airing_episode_info = parse_next_airing_episode(media_data.get("nextAiringEpisode"))
-    episodes = media_data.get("episodes")
-    if not episodes:
-        episodes = next_airing_episode_info.get("episode") - 1 if next_airing_episode_info else None
-
-    return AnilistMediaBase(
-        id=media_id,
-        idMal=media_data.get("idMal"),
-        media_type=media_type or MediaType.from_str(media_data.get("type")),
-        title=title,
-        coverImage=image,
-        bannerImage=media_data.get("bannerImage"),
-        description=media_data.get("description"),
-        genres=parse_genres(media_data.get("genres")),
-        score=score,
-        info=info,
-        synonyms=media_data.get("synonyms"),
-        tags=tag_list,
-        startDate=start_date,
-        endDate=end_date,
-        studios=studio_list,
-        characters=character_list,
-        trailer=parse_trailer(media_data.get("trailer")) if fields is None or "trailer" in fields else None,
-        siteUrl=media_data.get("siteUrl"),
-        isAdult=media_data.get("isAdult"),
-        duration=media_data.get("duration"),
-        episodes=episodes,
-        chapters=media_data.get("chapters"),
-        volumes=media_data.get("volumes"),
-        next_episode = next_airing_episode_info.get("episode") if next_airing_episode_info else None,
-        next_episode_airing_at = next_airing_episode_info.get("airingAt") if next_airing_episode_info else None,
-        time_until_next_episode = next_airing_episode_info.get("timeUntilAiring") if next_airing_episode_info else None,
-
-    )
+    if plan is None:
+        plan = compile_parse_plan(fields)
+    return plan.parse(media_data, media_type, media_cls)
 
-def parse_relation(relation_data: Optional[dict], media_id: int, fields: Optional[Set[str]] = None) -> Optional['AnilistRelation']:
+def parse_relation(relation_data: Optional[dict], media_id: int, fields: Optional[Set[str]] = None,
+                   plan: Optional[MediaParsePlan] = None) -> Optional['AnilistRelation']:
     """
     :param relation_data: value at data[AnilistMedia][relation][edges][index]
     :param media_id: id of media
+    :param plan: precompiled plan, replaces `fields`
     :return:
     """
     if not relation_data:
@@ -224,13 +315,15 @@ def parse_relation(relation_data: Optional[dict], media_id: int, fields: Optiona
     return AnilistRelation(
         from_media_id=media_id,  # Set to 0 or update dynamically if you track current media id
         relation_type=MediaRelation.from_str(relation_type),
-        media=parse_media_base(node, fields=fields)
+        media=parse_media_base(node, fields=fields, plan=plan)
     )
 
-def parse_recommendation(media_id: int, media_data: Dict[str, Any], fields: Optional[Set[str]] = None) -> Optional[AnilistRecommendation]:
+def parse_recommendation(media_id: int, media_data: Dict[str, Any], fields: Optional[Set[str]] = None,
+                         plan: Optional[MediaParsePlan] = None) -> Optional[AnilistRecommendation]:
     """
     :param media_id: id of media
     :param media_data: value at data[AnilistMedia][recommendations][nodes][mediaRecommendation]
+    :param plan: precompiled plan, replaces `fields`
     :return: data class of AnilistRecommendation
     """
     if not media_data:
@@ -238,47 +331,60 @@ def parse_recommendation(media_id: int, media_data: Dict[str, Any], fields: Opti
 
     return AnilistRecommendation(
         from_media_id=media_id,
-        media=parse_media_base(media_data, fields=fields)
+        media=parse_media_base(media_data, fields=fields, plan=plan)
     )
 
+def _parse_relations(media_data: Dict[str, Any], media_id: int, plan: MediaParsePlan) -> List[AnilistRelation]:
+    relation_list = []
+    relations = media_data.get("relations")
+    if relations:
+        for relation in relations.get("edges", []):
+            rel_data = parse_relation(relation, media_id, plan=plan)
+            if rel_data:
+                relation_list.append(rel_data)
+    return relation_list
+
+
+def _parse_recommendations(media_data: Dict[str, Any], media_id: int,
+                           plan: MediaParsePlan) -> List[AnilistRecommendation]:
+    recommendation_list = []
+    recommendations = media_data.get("recommendations")
+    if recommendations:
+        for recommendation in recommendations.get("nodes", []):
+            media_rec = recommendation.get("mediaRecommendation")
+            if media_rec:
+                recom_data = parse_recommendation(media_id, media_rec, plan=plan)
+                if recom_data:
+                    recommendation_list.append(recom_data)
+    return recommendation_list
+
+
 def parse_media(
     media_data: dict,
     media_type: MediaType,
     media_fields: Optional[Set[str]] = None,
     relation_fields: Optional[Set[str]] = None,
-    recommendation_fields: Optional[Set[str]] = None
+    recommendation_fields: Optional[Set[str]] = None,
+    plan: Optional[MediaParsePlan] = None
 ) -> Optional[AnilistMedia]:
-    media_id = media_data.get("id")
-    if not media_id:
-        return None
+    """
+    Parse a full media. Pass a `plan` from `compile_parse_plan` when parsing many media with the same fields,
+    it replaces the three field sets.
+    """
+    if plan is None:
+        plan = compile_parse_plan(media_fields, relation_fields, recommendation_fields)
 
-    media = parse_media_base(media_data, media_type, media_fields)
+    media = plan.parse(media_data, media_type, AnilistMedia)
+    if media is None:
+        return None
+    media_id = media.id
 
-    relation_list = []
-    if (media_fields is None or "relations" in media_fields) and relation_fields is not None:
-        relations = media_data.get("relations")
-        if relations:
-            for relation in relations.get("edges", []):
-                rel_data = parse_relation(relation, media_id, relation_fields)
-                if rel_data:
-                    relation_list.append(rel_data)
+    media.relations = (_parse_relations(media_data, media_id, plan.relation_plan)
+                       if plan.relation_plan is not None else [])
+    media.recommendations = (_parse_recommendations(media_data, media_id, plan.recommendation_plan)
+                             if plan.recommendation_plan is not None else [])
 
-    recommendation_list = []
-    if (media_fields is None or "recommendations" in media_fields) and recommendation_fields is not None:
-        recommendations = media_data.get("recommendations")
-        if recommendations:
-            for recommendation in recommendations.get("nodes", []):
-                media_rec = recommendation.get("mediaRecommendation")
-                if media_rec:
-                    recom_data = parse_recommendation(media_id, media_rec, recommendation_fields)
-                    if recom_data:
-                        recommendation_list.append(recom_data)
-
-    return AnilistMedia(
-        **vars(media),
-        relations=relation_list,
-        recommendations=recommendation_list
-    )
+    return media
 
 def parse_graphql_media_data(graphql_media_data: Dict[str, Any], media_type: MediaType) -> Optional[AnilistMedia]:
     media_data = graphql_media_data.get("data", {}).get("Media") or graphql_media_data.get("Media")
@@ -296,34 +402,81 @@ if __name__ == '__main__':
     from pprint import pprint
     from pathlib import Path
     import json
-    path = Path(r"D:\Program\AnilistPython\AnillistPython\samples\media_2.json")
+    # the full benchmark suite lives in benchmarks/run.py
+    path = Path(__file__).resolve().parents[2] / "benchmarks" / "fixtures" / "media.json"
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
 
-    media_data = data["data"]["media"]
+    media_data = data["Media"]
+    # a search page holds up to 50 media
+    page = [media_data] * 50
 
     # Define field sets
     minimal_fields = {"id", "title", "coverImage", "score", "siteUrl"}
     full_fields = None  # This means "parse everything"
 
-    # Wrap parse_media in a callable for benchmarking
-    def run_minimal():
-        parse_media(media_data, MediaType.ANIME, media_fields=minimal_fields)
+    # the parse path before parse plans: every field is checked against `fields` again for each media
+    def parse_media_per_item(media_data: dict, media_type: MediaType, fields: Optional[Set[str]]) -> AnilistMedia:
+        media_id = media_data.get("id")
+        include_field = lambda field: fields is None or field in fields
+        next_airing_episode_info = parse_next_airing_episode(media_data.get("nextAiringEpisode"))
+        episodes = media_data.get("episodes")
+        if not episodes:
+            episodes = next_airing_episode_info.get("episode") - 1 if next_airing_episode_info else None
+        base = AnilistMediaBase(
+            id=media_id,
+            idMal=media_data.get("idMal"),
+            media_type=media_type or MediaType.from_str(media_data.get("type")),
+            title=parse_title(media_data.get("title")) if include_field("title") else None,
+            coverImage=parse_cover_image(media_data.get("coverImage")) if include_field("coverImage") else None,
+            bannerImage=media_data.get("bannerImage"),
+            description=media_data.get("description"),
+            genres=parse_genres(media_data.get("genres")),
+            score=parse_score(media_data, media_id) if include_field("score") else None,
+            info=parse_media_info(media_data, media_id) if include_field("info") else None,
+            synonyms=media_data.get("synonyms"),
+            tags=(_parse_list(media_data.get("tags"), parse_tag, media_id) if include_field("tags") else []),
+            startDate=parse_date(media_data.get("startDate")) if include_field("startDate") else None,
+            endDate=parse_date(media_data.get("endDate")) if include_field("endDate") else None,
+            studios=(_parse_list((media_data.get("studios") or {}).get("edges"), parse_studio, media_id)
+                     if include_field("studios") else []),
+            characters=(_parse_list((media_data.get("characters") or {}).get("edges"), parse_character, media_id)
+                        if include_field("characters") else []),
+            trailer=parse_trailer(media_data.get("trailer")) if include_field("trailer") else None,
+            siteUrl=media_data.get("siteUrl"),
+            isAdult=media_data.get("isAdult"),
+            duration=media_data.get("duration"),
+            episodes=episodes,
+            chapters=media_data.get("chapters"),
+            volumes=media_data.get("volumes"),
+            next_episode=next_airing_episode_info.get("episode") if next_airing_episode_info else None,
+            next_episode_airing_at=next_airing_episode_info.get("airingAt") if next_airing_episode_info else None,
+            time_until_next_episode=(next_airing_episode_info.get("timeUntilAiring")
+                                     if next_airing_episode_info else None),
+        )
+        return AnilistMedia(**{name: getattr(base, name) for name in base.__slots__},
+                            relations=[], recommendations=[])
+
+    def run_per_item(fields):
+        for media in page:
+            parse_media_per_item(media, MediaType.ANIME, fields)
 
-    def run_full():
-        parse_media(media_data, MediaType.ANIME, media_fields=full_fields)
+    def run_plan(fields):
+        plan = compile_parse_plan(fields)
+        for media in page:
+            parse_media(media, MediaType.ANIME, plan=plan)
 
     # Benchmark both
-    runs = 10
-    min_time = timeit(run_minimal, number=runs)
-    full_time = timeit(run_full, number=runs)
-
-    print(f"✅ Benchmark Results ({runs} runs):")
-    print(f"Minimal fields parse time:     {min_time:.4f} seconds")
-    print(f"Full parse time:               {full_time:.4f} seconds")
-    print(f"Speedup:                       {full_time / min_time:.2f}x faster using minimal fields")
+    runs = 100
+    print(f"✅ Benchmark Results ({runs} runs of a {len(page)} item page):")
+    for name, fields in (("Minimal", minimal_fields), ("Full", full_fields)):
+        per_item_time = timeit(lambda: run_per_item(fields), number=runs)
+        plan_time = timeit(lambda: run_plan(fields), number=runs)
+        print(f"{name + ' fields, checked per item:':<36}{per_item_time:.4f} seconds")
+        print(f"{name + ' fields, precompiled plan:':<36}{plan_time:.4f} seconds")
+        print(f"{'Speedup:':<36}{per_item_time / plan_time:.2f}x")
 
     # Optional: print one actual result
     print("\nParsed media (minimal):")
     media = parse_media(media_data, MediaType.ANIME, media_fields=minimal_fields)
-    # pprint(media)
\ No newline at end of file
+    # pprint(media)
@@ -2,18 +2,27 @@ from typing import Dict, List, Any, Set, Optional
 
 from AnillistPython.models import AnilistMedia, MediaType, AnilistSearchResult
 from AnillistPython.parser.common import parse_page_info
-from AnillistPython.parser.media import parse_media
+from AnillistPython.parser.media import parse_media, compile_parse_plan
+from AnillistPython.parser.lazy import LazyAnilistMedia
 
 
 def parse_searched_media(graphql_data: Dict[str, Any], media_type: MediaType,
                          media_fields: Optional[Set[str]] = None, relations_fields: Optional[Set[str]] = None,
-                         recommendation_fields: Optional[Set[str]] = None) -> AnilistSearchResult:
+                         recommendation_fields: Optional[Set[str]] = None, lazy: bool = False) -> AnilistSearchResult:
+    """
+    :param lazy: fill the result with `LazyAnilistMedia` that parse each attribute on first access
+    """
     graphql_data = graphql_data["Page"]
     page_info = graphql_data["pageInfo"]
     medias = graphql_data.get('media', [])
     parsed_medias = list()
+    plan = compile_parse_plan(media_fields, relations_fields, recommendation_fields)
     for media in medias:
-        parsed_media = parse_media(media, media_type, media_fields, relations_fields, recommendation_fields)
+        if lazy:
+            if media and media.get("id"):
+                parsed_medias.append(LazyAnilistMedia(media, media_type, plan))
+            continue
+        parsed_media = parse_media(media, media_type, plan=plan)
         if parsed_media:
             parsed_medias.append(parsed_media)
 
@@ -1,3 +1,14 @@
-from .media import MediaQueryBuilder, MediaQueryBuilderBase
-from .search_media import SearchQueryBuilder
-from .user import UserActivityQueryBuilder
\ No newline at end of file
+from typing import TYPE_CHECKING
+
+from AnillistPython.utils.lazy_import import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(__name__, {
+    ".media": ["MediaQueryBuilder", "MediaQueryBuilderBase"],
+    ".search_media": ["SearchQueryBuilder"],
+    ".user": ["UserActivityQueryBuilder"],
+})
+
+if TYPE_CHECKING:
+    from .media import MediaQueryBuilder, MediaQueryBuilderBase
+    from .search_media import SearchQueryBuilder
+    from .user import UserActivityQueryBuilder
@@ -0,0 +1,63 @@
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+
+_Builder = TypeVar("_Builder", bound="ImmutableBuilder")
+_MISSING = object()
+
+
+class ImmutableBuilder:
+    """
+    Base of the query builders. A builder never changes once created: every `include_*`/`set_*` call returns a
+    new builder sharing the unchanged field fragments with its parent.
+
+    Derived builders are memoized on their parent, so repeating a call such as `include_anime_fields()` returns
+    the same builder, together with the query text it already built.
+    """
+    _MAX_MEMOIZED = 32
+
+    def _init_state(self, **state: Any):
+        self.__dict__.update(state, _derived=None, _cache=None)
+
+    def _replace(self: _Builder, **changes: Any) -> _Builder:
+        clone = object.__new__(type(self))
+        state = self.__dict__.copy()
+        state.update(changes, _derived=None, _cache=None)
+        object.__setattr__(clone, "__dict__", state)
+        return clone
+
+    def _memo(self, store_name: str, key: Hashable, factory: Callable[[], Any]) -> Any:
+        # the memo dicts are created on first use, most intermediate builders never need them
+        store: Optional[Dict[Hashable, Any]] = self.__dict__[store_name]
+        if store is None:
+            store = self.__dict__[store_name] = {}
+        else:
+            value = store.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            if len(store) >= self._MAX_MEMOIZED:
+                store.pop(next(iter(store)))
+        value = store[key] = factory()
+        return value
+
+    def _derive(self: _Builder, key: Hashable, factory: Callable[[], _Builder]) -> _Builder:
+        return self._memo("_derived", key, factory)
+
+    def _cached(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        return self._memo("_cache", key, factory)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is immutable, include_*/set_* methods return a new builder")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __getstate__(self):
+        return {name: value for name, value in self.__dict__.items() if name not in ("_derived", "_cache")}
+
+    def __setstate__(self, state):
+        self._init_state(**state)
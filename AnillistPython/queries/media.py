@@ -1,5 +1,7 @@
 import hashlib
-from typing import Optional, List, Union, overload, override, Tuple, Set
+from typing import Optional, List, Union, overload, override, Tuple, Set, FrozenSet
+
+from AnillistPython.queries.base import ImmutableBuilder
 
 page_query: str = """
     Page (page: $page, perPage: $perpage) {
@@ -12,26 +14,33 @@ page_query: str = """
                     """
 
 
-class MediaQueryBuilderBase:
+class MediaQueryBuilderBase(ImmutableBuilder):
+    """
+    Immutable builder of the media selection: each `include_*` returns a new builder, the original is unchanged.
+    """
+
     def __init__(self):
-        self.fields = ["id", "idMal", "type"]
-        self._included_fields = {"id", "idMal", "type"}
+        self._init_state(fields=("id", "idMal", "type"), _included_fields=frozenset({"id", "idMal", "type"}))
+
+    def _include(self, fragment: str, *included: str, **changes):
+        """Derived builder selecting `fragment` too, memoized so repeated calls return the same builder."""
+        return self._derive(
+            (fragment, included, tuple(changes.items())),
+            lambda: self._replace(fields=self.fields + (fragment,),
+                                  _included_fields=self._included_fields.union(included), **changes),
+        )
 
     def include_title(self):
-        self._included_fields.add('title')
-        self.fields.append("""
+        return self._include("""
             title {
                 romaji
                 english
                 native
-            }""")
-        return self
+            }""", 'title')
 
     def include_description(self):
-        self._included_fields.add('description')
-        self.fields.append("""
-            description""")
-        return self
+        return self._include("""
+            description""", 'description')
 
     def include_images(self,
                        include_large: bool = True,
@@ -39,7 +48,6 @@ class MediaQueryBuilderBase:
                        include_extra_large: bool = False,
                        include_color: bool = False,
                        ):
-        self._included_fields.add('coverImage')
         cover_fields = []
         if include_large:
             cover_fields.append("large")
@@ -52,26 +60,22 @@ class MediaQueryBuilderBase:
 
         field = " ".join(cover_fields)
 
-        if cover_fields:
-            cover_block = f"""
+        if not cover_fields:
+            return self._replace(_included_fields=self._included_fields | {'coverImage'})
+        cover_block = f"""
             coverImage {{ {field} }}"""
-            self.fields.append(cover_block)
-        return self
+        return self._include(cover_block, 'coverImage')
 
     def include_banner_image(self):
-        self._included_fields.add('bannerImage')
-        self.fields.append("""
-            bannerImage""")
-        return self
+        return self._include("""
+            bannerImage""", 'bannerImage')
 
     def include_synonyms(self):
-        self.fields.append("""
+        return self._include("""
             synonyms""")
-        return self
 
     def include_tags(self, include_id=True, include_name=True, include_description=False,
                      include_category=False, include_is_adult=False):
-        self._included_fields.add('tags')
         fields = []
         if include_id:
             fields.append("id")
@@ -84,23 +88,19 @@ class MediaQueryBuilderBase:
         if include_is_adult:
             fields.append("isAdult")
 
-        self.fields.append(
+        return self._include(
             f"""
             tags {{
                 {' '.join(fields)}
-            }}"""
+            }}""", 'tags'
         )
-        return self
 
     def include_genres(self):
-        self._included_fields.add('genres')
-        self.fields.append("""
-            genres""")
-        return self
+        return self._include("""
+            genres""", 'genres')
 
     def include_studios(self, is_main: bool = True):
-        self._included_fields.add('studios')
-        self.fields.append(
+        return self._include(
             f"""
             studios(isMain: {"true" if is_main else "false"}) {{
                 edges {{
@@ -110,47 +110,38 @@ class MediaQueryBuilderBase:
                     }}
                 }}
             }}
-            """
+            """, 'studios'
         )
-        return self
 
     def include_score(self):
-        self._included_fields.add('score')
-        self.fields.append(
+        return self._include(
             """
             averageScore
             meanScore
             popularity
-            favourites"""
+            favourites""", 'score'
         )
-        return self
 
     def include_info(self):
-        self._included_fields.add('info')
-        self.fields.append(
+        return self._include(
             """
             format
             source
             countryOfOrigin
             season
-            status"""
+            status""", 'info'
         )
-        return self
 
     def include_dates(self):
-        self._included_fields.add('startDate')
-        self._included_fields.add('endDate')
-        self.fields.append(
+        return self._include(
             """
             startDate { year month day }
-            endDate { year month day }"""
+            endDate { year month day }""", 'startDate', 'endDate'
         )
-        return self
 
 
     def include_characters(self, page: int = 1, perpage: int = 10, include_description=False, include_age=False,
                            include_dob=False):
-        self._included_fields.add('characters')
         node_fields = [
             "id",
             "name { full }",
@@ -175,65 +166,56 @@ class MediaQueryBuilderBase:
                 }}
             }}"""
 
-        self.fields.append(character_fragment)
-        return self
+        return self._include(character_fragment, 'characters')
 
     def include_trailer(self):
-        self._included_fields.add('trailer')
-        self.fields.append("""
-            trailer {{
+        return self._include("""
+            trailer {
                 id
                 site
                 thumbnail
-            }}""")
-        return self
+            }""", 'trailer')
 
     def include_is_adult(self):
-        self._included_fields.add("isAdult")
-        self.fields.append("""
-            isAdult""")
-        return self
+        return self._include("""
+            isAdult""", "isAdult")
 
     def include_anilist_site(self):
-        self._included_fields.add('siteUrl')
-        self.fields.append("""
-            siteUrl""")
-        return self
+        return self._include("""
+            siteUrl""", 'siteUrl')
 
     def include_myanimelist_id(self):
-        self._included_fields.add('idMal')
-        self.fields.append("""
-            idMal""")
-        return self
+        return self._include("""
+            idMal""", 'idMal')
+
+    def include_updated_at(self):
+        return self._include("""
+            updatedAt""", 'updatedAt')
 
     def include_anime_fields(self):
-        self._included_fields.add('episodes')
-        self._included_fields.add('duration')
-        self.fields.append("""
+        return self._include("""
             episodes
-            duration""")
-        self.fields.append("""
+            duration""", 'episodes', 'duration')._include("""
             nextAiringEpisode {
                 airingAt
                 timeUntilAiring
                 episode}""")
-        return self
 
     def include_manga_fields(self):
-        self._included_fields.add('chapters')
-        self._included_fields.add('genres')
-        self.fields.append("""
+        return self._include("""
             chapters
-            volumes""")
-        return self
+            volumes""", 'chapters', 'genres')
 
-    def field(self) -> List[str]:
+    def field(self) -> Tuple[str, ...]:
         return self.fields
 
-    def included_options(self)->Set:
+    def included_options(self) -> FrozenSet[str]:
         return self._included_fields
 
     def build(self) -> str:
+        return self._cached("build", self._build)
+
+    def _build(self) -> str:
         fields_str = ' '.join(self.fields)
         return f"""query ($id: Int) {{
         Media(id: $id) {{
@@ -241,47 +223,59 @@ class MediaQueryBuilderBase:
           }}
     }}""".strip()
 
+    def build_batch(self) -> str:
+        """Query selecting several media by id in one request, variables: `ids` and `perpage` (max 50)."""
+        return self._cached("build_batch", self._build_batch)
+
+    def _build_batch(self) -> str:
+        fields_str = ' '.join(self.fields)
+        return f"""query ($ids: [Int], $perpage: Int) {{
+        Page(page: 1, perPage: $perpage) {{
+            media(id_in: $ids) {{
+                {fields_str}
+            }}
+          }}
+    }}""".strip()
+
     def include_all(self, is_anime: bool = False, page:int = 1, perpage: int = 5):
-        self.include_myanimelist_id()
-        self.include_title()
-        self.include_description()
-        self.include_images(True, True, True, True)
-        self.include_banner_image()
-        self.include_genres()
-        self.include_score()
-        self.include_info()
-        self.include_synonyms()
-        self.include_tags(True, True, True, True, True)
-        self.include_dates()
-        self.include_studios()
-        self.include_characters(page, perpage, True, True, True)
-        self.include_trailer()
-        self.include_anilist_site()
-        self.include_is_adult()
-        self.include_anime_fields() if is_anime else self.include_manga_fields()
-
-        return self
+        builder = (self.include_myanimelist_id()
+                   .include_title()
+                   .include_description()
+                   .include_images(True, True, True, True)
+                   .include_banner_image()
+                   .include_genres()
+                   .include_score()
+                   .include_info()
+                   .include_synonyms()
+                   .include_tags(True, True, True, True, True)
+                   .include_dates()
+                   .include_studios()
+                   .include_characters(page, perpage, True, True, True)
+                   .include_trailer()
+                   .include_anilist_site()
+                   .include_is_adult())
+        return builder.include_anime_fields() if is_anime else builder.include_manga_fields()
 
     def build_full(self, is_anime: bool, page:int = 1, perpage: int = 5) -> str:
         # Call all include methods you want in the full query
-        self.include_all(is_anime, page, perpage)
-        # You can add more includes if you define them later
-
-        return self.build()
+        return self.include_all(is_anime, page, perpage).build()
 
     def reset_build(self):
-        self.fields = ["id", "idMal", "type"]
-        self._included_fields = {"id", "idMal", "type"}
+        """Returns an empty builder, builders are immutable so this one keeps its fields."""
+        return type(self)()
 
     def __hash__(self):
-        return int(self.stable_hash(), 16)
+        return self._cached("__hash__", lambda: int(self.stable_hash(), 16))
 
     def stable_hash(self) -> str:
+        return self._cached("stable_hash", self._stable_hash)
+
+    def _stable_hash(self) -> str:
         # Ensure every item is a string (and flatten if needed)
         fields = self.included_options()
         normalized = []
         for item in fields:
-            if isinstance(item, set):
+            if isinstance(item, (set, frozenset)):
                 # Flatten nested sets (e.g. {'id', 'idMal'})
                 normalized.extend(str(subitem) for subitem in sorted(item))
             else:
@@ -290,23 +284,23 @@ class MediaQueryBuilderBase:
         combined = '|'.join(sorted(normalized))
         return hashlib.sha256(combined.encode('utf-8')).hexdigest()
 
+    def _eq_key(self) -> Tuple[str, ...]:
+        return self._cached("_eq_key", lambda: tuple(sorted(self.fields)))
+
     def __eq__(self, other):
         if not isinstance(other, MediaQueryBuilderBase):
             return NotImplemented
-        return sorted(self.fields) == sorted(other.fields)
+        return self is other or self._eq_key() == other._eq_key()
 
 class MediaQueryBuilder(MediaQueryBuilderBase):
     def __init__(self):
         super().__init__()
-        self._included_relations_fields = set()
-        self._included_recommendations_fields = set()
+        self.__dict__.update(_included_relations_fields=frozenset(), _included_recommendations_fields=frozenset())
 
     def include_relations(self, query: MediaQueryBuilderBase):
-        self._included_relations_fields = query.included_options()
-        self._included_fields.add('relations')
         relation_field = query.field()
         relation_query = " ".join(relation_field)
-        self.fields.append(
+        return self._include(
             f"""
             relations{{
                 edges {{
@@ -315,16 +309,14 @@ class MediaQueryBuilder(MediaQueryBuilderBase):
                         {relation_query}
                     }}
                 }}
-            }}"""
+            }}""", 'relations',
+            _included_relations_fields=query.included_options()
         )
-        return self
 
     def include_recommendations(self, query: MediaQueryBuilderBase, page: int = 1, perpage: int = 10):
-        self._included_fields.add('recommendations')
-        self._included_recommendations_fields = query.included_options()
         recommendation_field = query.field()
         recommendation_str = " ".join(recommendation_field)
-        self.fields.append(
+        return self._include(
             f"""
             recommendations(page: {page}, perPage: {perpage}) {{
                 pageInfo {{
@@ -336,29 +328,25 @@ class MediaQueryBuilder(MediaQueryBuilderBase):
                         {recommendation_str}
                     }}
                 }}
-            }}"""
+            }}""", 'recommendations',
+            _included_recommendations_fields=query.included_options()
         )
-        return self
 
     @override
     def include_all(self, is_anime: bool, page:int, perpage: int,
                     relations_build: MediaQueryBuilderBase, recomendation_build: MediaQueryBuilderBase):
-        super().include_all(is_anime, page, perpage)
-        self.include_recommendations(recomendation_build, page=page, perpage=perpage)
-        self.include_relations(relations_build)
-        return self
+        return (super().include_all(is_anime, page, perpage)
+                .include_recommendations(recomendation_build, page=page, perpage=perpage)
+                .include_relations(relations_build))
 
 
     @override
     def build_full(self, is_anime: bool, page: int, perpage: int,
                 relations_build: MediaQueryBuilderBase, recomendation_build: MediaQueryBuilderBase) -> str:
         # Call all include methods you want in the full query
-        self.include_all(is_anime, page, perpage, relations_build, recomendation_build)
-        # You can add more includes if you define them later
-
-        return self.build()
+        return self.include_all(is_anime, page, perpage, relations_build, recomendation_build).build()
 
-    def included_options(self)->Tuple[Set, Set, Set]:
+    def included_options(self) -> Tuple[FrozenSet[str], FrozenSet[str], FrozenSet[str]]:
         return self._included_fields, self._included_relations_fields, self._included_recommendations_fields
 
 if __name__ == "__main__":
@@ -1,131 +1,188 @@
 import hashlib
 import json
-from typing import Union, List, Set, Optional
+from functools import lru_cache
+from typing import Union, List, Set, Optional, Tuple, Dict, Any
 
+from AnillistPython.queries.base import ImmutableBuilder
 from AnillistPython.queries.media import MediaQueryBuilder
 from AnillistPython.models import (MediaSeason, MediaSource, MediaStatus, MediaType, MediaFormat, MediaRelation,
                                 MediaSort, MediaGenre)
 
 
-class SearchQueryBuilder:
+# GraphQL type of each filter argument of `Page.media`, filters are sent as variables of these types
+FILTER_VARIABLE_TYPES: Dict[str, str] = {
+    "sort": "[MediaSort]",
+    "type": "MediaType",
+    "format_in": "[MediaFormat]",
+    "format_not_in": "[MediaFormat]",
+    "status_in": "[MediaStatus]",
+    "status_not_in": "[MediaStatus]",
+    "source_in": "[MediaSource]",
+    "season": "MediaSeason",
+    "seasonYear": "Int",
+    "genre_in": "[String]",
+    "genre_not_in": "[String]",
+    "tag_in": "[String]",
+    "tag_not_in": "[String]",
+    "averageScore_greater": "Int",
+    "averageScore_lesser": "Int",
+    "episodes_greater": "Int",
+    "episodes_lesser": "Int",
+    "duration_greater": "Int",
+    "duration_lesser": "Int",
+    "chapters_greater": "Int",
+    "chapters_lesser": "Int",
+    "startDate_greater": "FuzzyDateInt",
+    "startDate_lesser": "FuzzyDateInt",
+    "isAdult": "Boolean",
+}
+
+
+@lru_cache(maxsize=256)
+def _search_document(filter_names: Tuple[str, ...], media_fields_str: str) -> str:
+    # the document only depends on which filters are set, so every builder setting the same ones shares it
+    declarations = "".join(f", ${name}: {FILTER_VARIABLE_TYPES[name]}" for name in filter_names)
+    arguments = "".join(f", {name}: ${name}" for name in filter_names)
+    return f"""
+                query ($query: String, $page: Int, $perpage: Int{declarations}) {{
+                    Page(page: $page, perPage: $perpage) {{
+                        pageInfo {{
+                            total
+                            currentPage
+                            lastPage
+                            hasNextPage
+                        }}
+                        media(search: $query{arguments}) {{
+                            {media_fields_str}
+                        }}
+                    }}
+                }}
+                """.strip()
+
+
+class SearchQueryBuilder(ImmutableBuilder):
+    """
+    Immutable builder of the search filters: each `set_*` returns a new builder, the original is unchanged.
+
+    Filter values are not part of the query text: `build()` declares a variable per filter that is set and
+    `filter_variables()` returns their values, to be sent along with the page variables.
+    """
+
     def __init__(self):
-        self.variables = {}
-        self.filters = []
-        self._included_options: Set[str] = set()
-
-    def _add_or_replace_filter(self, key: str, value: str):
-        pattern = f"{key}:"
-        existing = next((i for i, f in enumerate(self.filters) if f.startswith(pattern)), None)
-        filter_str = f"{key}: {value}"
-        if existing is not None:
-            self.filters[existing] = filter_str
-        else:
-            self.filters.append(filter_str)
+        # filters: (name, value) pairs sorted by name, list values are stored as tuples
+        self._init_state(variables={}, filters=(), _included_options=frozenset())
+
+    def _set_filter(self, name: str, value: Any):
+        def derive():
+            filters = dict(self.filters)
+            filters[name] = value
+            return self._replace(filters=tuple(sorted(filters.items())))
+
+        return self._derive((name, value), derive)
+
+    def _set_variable(self, name: str, value):
+        return self._derive(("$", name, value), lambda: self._replace(variables={**self.variables, name: value}))
 
     def set_search(self, query: str):
-        self.variables["query"] = query
-        return self
+        return self._set_variable("query", query)
 
     def set_sort(self, sort: MediaSort):
         if "sort" in self._included_options:
             raise ValueError('There can be only one argument named "sort"')
-        self._included_options.add("sort")
-        self._add_or_replace_filter("sort", sort.value)
-        return self
+        return self._derive(("sort", sort.value), lambda: self._set_filter("sort", (sort.value,))._replace(
+            _included_options=self._included_options | {"sort"}))
 
     def set_type(self, media_type: MediaType):
-        self._add_or_replace_filter("type", media_type.value)
-        return self
+        return self._set_filter("type", media_type.value)
 
     def set_formats(self, media_formats: List[MediaFormat], is_excluded: bool = False):
-        values = ", ".join(fmt.value for fmt in media_formats)
         key = "format_not_in" if is_excluded else "format_in"
-        self._add_or_replace_filter(key, f"[{values}]")
-        return self
+        return self._set_filter(key, tuple(fmt.value for fmt in media_formats))
 
     def set_status(self, status: List[MediaStatus], is_excluded: bool = False):
-        values = ", ".join(s.value for s in status)
         key = "status_not_in" if is_excluded else "status_in"
-        self._add_or_replace_filter(key, f"[{values}]")
-        return self
+        return self._set_filter(key, tuple(s.value for s in status))
 
     def set_sources(self, sources: List[MediaSource]):
-        values = ", ".join(s.value for s in sources)
-        self._add_or_replace_filter("source_in", f"[{values}]")
-        return self
+        return self._set_filter("source_in", tuple(s.value for s in sources))
 
     def set_season(self, season: MediaSeason, year: Optional[int] = None):
-        self._add_or_replace_filter("season", season.value)
+        builder = self._set_filter("season", season.value)
         if year is not None:
-            self._add_or_replace_filter("seasonYear", str(year))
-        return self
+            builder = builder._set_filter("seasonYear", int(year))
+        return builder
 
     def set_genres(self, include: List[Union[MediaGenre, str]] = None, exclude: List[Union[MediaGenre, str]] = None):
+        builder = self
         if include:
-            values = ", ".join(f'"{g.value if isinstance(g, MediaGenre) else g}"' for g in include)
-            self._add_or_replace_filter("genre_in", f"[{values}]")
+            builder = builder._set_filter("genre_in", tuple(g.value if isinstance(g, MediaGenre) else g for g in include))
         if exclude:
-            values = ", ".join(f'"{g.value if isinstance(g, MediaGenre) else g}"' for g in exclude)
-            self._add_or_replace_filter("genre_not_in", f"[{values}]")
-        return self
+            builder = builder._set_filter("genre_not_in",
+                                          tuple(g.value if isinstance(g, MediaGenre) else g for g in exclude))
+        return builder
 
     def set_tags(self, include: List[str] = None, exclude: List[str] = None):
+        builder = self
         if include:
-            values = ", ".join(f'"{t}"' for t in include)
-            self._add_or_replace_filter("tag_in", f"[{values}]")
+            builder = builder._set_filter("tag_in", tuple(include))
         if exclude:
-            values = ", ".join(f'"{t}"' for t in exclude)
-            self._add_or_replace_filter("tag_not_in", f"[{values}]")
-        return self
+            builder = builder._set_filter("tag_not_in", tuple(exclude))
+        return builder
 
     def set_score_range(self, min_score: int = None, max_score: int = None):
+        builder = self
         if min_score is not None:
-            self._add_or_replace_filter("averageScore_greater", str(min_score))
+            builder = builder._set_filter("averageScore_greater", int(min_score))
         if max_score is not None:
-            self._add_or_replace_filter("averageScore_lesser", str(max_score))
-        return self
+            builder = builder._set_filter("averageScore_lesser", int(max_score))
+        return builder
 
     def set_episodes_range(self, min_episodes: int = None, max_episodes: int = None):
+        builder = self
         if min_episodes is not None:
-            self._add_or_replace_filter("episodes_greater", str(min_episodes))
+            builder = builder._set_filter("episodes_greater", int(min_episodes))
         if max_episodes is not None:
-            self._add_or_replace_filter("episodes_lesser", str(max_episodes))
-        return self
+            builder = builder._set_filter("episodes_lesser", int(max_episodes))
+        return builder
 
     def set_duration_range(self, min_duration: int = None, max_duration: int = None):
+        builder = self
         if min_duration is not None:
-            self._add_or_replace_filter("duration_greater", str(min_duration))
+            builder = builder._set_filter("duration_greater", int(min_duration))
         if max_duration is not None:
-            self._add_or_replace_filter("duration_lesser", str(max_duration))
-        return self
+            builder = builder._set_filter("duration_lesser", int(max_duration))
+        return builder
 
     def set_chapters_range(self, min_chapters: int = None, max_chapters: int = None):
+        builder = self
         if min_chapters is not None:
-            self._add_or_replace_filter("chapters_greater", str(min_chapters))
+            builder = builder._set_filter("chapters_greater", int(min_chapters))
         if max_chapters is not None:
-            self._add_or_replace_filter("chapters_lesser", str(max_chapters))
-        return self
+            builder = builder._set_filter("chapters_lesser", int(max_chapters))
+        return builder
 
     def set_year_range(self, min_year: int = None, max_year: int = None):
+        # FuzzyDateInt is YYYYMMDD
+        builder = self
         if min_year is not None:
-            self._add_or_replace_filter("startDate_greater", f"{min_year}0101")
+            builder = builder._set_filter("startDate_greater", int(min_year) * 10000 + 101)
         if max_year is not None:
-            self._add_or_replace_filter("startDate_lesser", f"{max_year}1231")
-        return self
+            builder = builder._set_filter("startDate_lesser", int(max_year) * 10000 + 1231)
+        return builder
 
     def set_adult(self, is_adult: bool = False):
-        self._add_or_replace_filter("isAdult", "true" if is_adult else "false")
-        return self
+        return self._set_filter("isAdult", bool(is_adult))
 
     def set_page(self, page: int = 1, per_page: int = 10):
-        self.variables["page"] = page
-        self.variables["perpage"] = per_page
-        return self
+        return self._set_variable("page", page)._set_variable("perpage", per_page)
+
+    def filter_variables(self) -> Dict[str, Any]:
+        """Values of the filter variables declared by `build()`, merge them into the request variables."""
+        return {name: list(value) if isinstance(value, tuple) else value for name, value in self.filters}
 
     def build(self, media_fields: MediaQueryBuilder) -> str:
         if isinstance(media_fields, MediaQueryBuilder):
-            media_fields = media_fields.field() # return List[str]
-            media_fields_str = ' '.join(media_fields)
+            media_fields = media_fields.field() # return Tuple[str]
 
         # elif isinstance(media_fields, str):
         #     media_fields_str = media_fields
@@ -133,34 +190,22 @@ class SearchQueryBuilder:
         else:
             raise TypeError('media_fields must be either str or list or MediaQueryBuilder')
 
-        filter_str = ', '.join(self.filters)
-        return f"""
-                query ($query: String, $page: Int, $perpage: Int) {{
-                    Page(page: $page, perPage: $perpage) {{
-                        pageInfo {{
-                            total
-                            currentPage
-                            lastPage
-                            hasNextPage
-                        }}
-                        media(search: $query, {filter_str}) {{  
-                            {media_fields_str}
-                        }}
-                    }}
-                }}
-                """.strip() #
-
-
+        # cached per selection, the filters of this builder never change
+        return self._cached(media_fields, lambda: _search_document(tuple(name for name, _ in self.filters),
+                                                                   ' '.join(media_fields)))
 
     def reset_build(self):
-        self.filters = []
-        self.variables = {}
+        """Returns an empty builder, builders are immutable so this one keeps its filters."""
+        return type(self)()
 
     def __hash__(self):
-        return int(self.stable_hash(), 16)
+        return self._cached("__hash__", lambda: int(self.stable_hash(), 16))
 
     def stable_hash(self) -> str:
-        filters_key = sorted(self.filters)
+        return self._cached("stable_hash", self._stable_hash)
+
+    def _stable_hash(self) -> str:
+        filters_key = self.filters
 
         # Convert to a deterministic string
         combined = json.dumps(filters_key, separators=(',', ':'))
@@ -171,10 +216,12 @@ class SearchQueryBuilder:
     def __eq__(self, other):
         if not isinstance(other, SearchQueryBuilder):
             return NotImplemented
-        return sorted(self.filters) == sorted(other.filters)
+        # filters are kept sorted
+        return self is other or self.filters == other.filters
 
 if __name__ == "__main__":
     media_query = MediaQueryBuilder()
     builder = SearchQueryBuilder().set_sort(MediaSort.TRENDING_DESC).set_search("one")
     query = builder.build(media_query)
     print(query)
+    print(builder.filter_variables())
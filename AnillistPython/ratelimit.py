@@ -0,0 +1,164 @@
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Mapping, Dict, Any
+
+import httpx
+from gql.transport.exceptions import TransportServerError, TransportQueryError
+from loguru import logger
+
+
+class RateLimiter:
+    """
+    Token bucket pacing requests to `requests_per_minute`.
+
+    The bucket adapts to AniList's `X-RateLimit-Limit`, `X-RateLimit-Remaining` and `Retry-After` headers:
+    a lower advertised limit slows the refill rate, a low remaining count drains the bucket and a
+    `Retry-After` blocks every waiter until it expires.
+    """
+
+    def __init__(self, requests_per_minute: int = 90, burst: int = 10):
+        if requests_per_minute < 1:
+            raise ValueError("requests_per_minute must be at least 1")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst
+        self._rate = requests_per_minute / 60
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+        self.queue_depth = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    async def acquire(self) -> float:
+        """Wait for a token, returns the time spent waiting in seconds."""
+        started = time.monotonic()
+        self.queue_depth += 1
+        try:
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    delay = self._blocked_until - now
+                    if delay <= 0:
+                        if self._tokens >= 1:
+                            self._tokens -= 1
+                            break
+                        delay = (1 - self._tokens) / self._rate
+                    await asyncio.sleep(delay)
+        finally:
+            self.queue_depth -= 1
+
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return waited
+
+    def block_for(self, seconds: float):
+        """Hold back every request for `seconds`, e.g. after a 429 response."""
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens = 0.0
+        self._blocked_until = max(self._blocked_until, now + seconds)
+        self.throttled += 1
+
+    def update_from_headers(self, headers: Optional[Mapping[str, str]]):
+        if not headers:
+            return
+
+        limit = _int_header(headers, "X-RateLimit-Limit")
+        if limit and limit < self.requests_per_minute:
+            logger.info(f"AniList advertises {limit} requests per minute, slowing down from {self.requests_per_minute}")
+            self.requests_per_minute = limit
+            self._rate = limit / 60
+
+        remaining = _int_header(headers, "X-RateLimit-Remaining")
+        if remaining is not None:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, float(remaining))
+
+        retry_after = parse_retry_after(headers)
+        if retry_after is not None:
+            self.block_for(retry_after)
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.acquired if self.acquired else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests_per_minute": self.requests_per_minute,
+            "queue_depth": self.queue_depth,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "total_wait": self.total_wait,
+            "average_wait": self.average_wait,
+            "max_wait": self.max_wait,
+        }
+
+
+def _int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    if not headers:
+        return None
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """HTTP status of a failed request, AniList also reports it inside the GraphQL errors of a 429 answer."""
+    if isinstance(error, TransportServerError):
+        return error.code
+    if isinstance(error, TransportQueryError):
+        for err in error.errors or []:
+            if isinstance(err, dict) and isinstance(err.get("status"), int):
+                return err["status"]
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    # gql >= 4 raises TransportConnectionFailed from the httpx error
+    cause: Optional[BaseException] = error
+    while cause is not None:
+        if isinstance(cause, (httpx.TimeoutException, httpx.NetworkError)):
+            return True
+        cause = cause.__cause__
+    status = error_status(error)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,70 @@
+import pickle
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Union
+
+from graphql import GraphQLSchema, build_schema
+from loguru import logger
+
+BUNDLED_SCHEMA_PATH = Path(__file__).with_name("schema.graphql")
+
+
+def read_schema_sdl(path: Union[str, Path] = BUNDLED_SCHEMA_PATH) -> str:
+    raw = Path(path).read_bytes()
+    # the bundled schema is stored as UTF-16 with a BOM
+    if raw.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return raw.decode("utf-16")
+    return raw.decode("utf-8-sig")
+
+
+def _load_pickled_schema(cache_path: Path, schema_path: Path) -> Optional[GraphQLSchema]:
+    if not cache_path.exists() or cache_path.stat().st_mtime < schema_path.stat().st_mtime:
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            schema = pickle.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable schema cache {cache_path}: {e}")
+        return None
+    if not isinstance(schema, GraphQLSchema):
+        logger.warning(f"Ignoring schema cache {cache_path}: not a GraphQLSchema")
+        return None
+    return schema
+
+
+def _dump_pickled_schema(schema: GraphQLSchema, cache_path: Path):
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, "wb") as f:
+            pickle.dump(schema, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        logger.warning(f"Unable to write schema cache {cache_path}: {e}")
+
+
+@lru_cache(maxsize=None)
+def _load_schema(schema_path: Path, cache_path: Optional[Path]) -> GraphQLSchema:
+    if cache_path is not None:
+        schema = _load_pickled_schema(cache_path, schema_path)
+        if schema is not None:
+            logger.debug(f"Loaded schema from cache {cache_path}")
+            return schema
+
+    schema = build_schema(read_schema_sdl(schema_path))
+    logger.debug(f"Built schema from {schema_path}")
+
+    if cache_path is not None:
+        _dump_pickled_schema(schema, cache_path)
+    return schema
+
+
+def load_schema(schema_path: Union[str, Path] = BUNDLED_SCHEMA_PATH,
+                cache_path: Optional[Union[str, Path]] = None) -> GraphQLSchema:
+    """
+    Build the client schema from an SDL file without an introspection round-trip.
+
+    The schema is built once per process. When `cache_path` is given the built schema is pickled there and
+    reused by later processes until the SDL file changes.
+    """
+    schema_path = Path(schema_path).resolve()
+    cache_path = Path(cache_path).resolve() if cache_path is not None else None
+    return _load_schema(schema_path, cache_path)
@@ -0,0 +1,84 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from loguru import logger
+
+
+@dataclass
+class SyncState:
+    """
+    Progress of the incremental sync of one catalog.
+
+    `updated_at` is the newest `updatedAt` stored by the last completed sync and `ids` the media stored with
+    exactly that timestamp. While a sync runs, `run_updated_at`/`run_ids` hold its own high-water mark and
+    `run_page` the last page it stored, so a restarted sync continues from that page.
+    """
+    updated_at: Optional[int] = None
+    ids: List[int] = field(default_factory=list)
+    run_updated_at: Optional[int] = None
+    run_ids: List[int] = field(default_factory=list)
+    run_page: Optional[int] = None
+
+    @property
+    def in_progress(self) -> bool:
+        return self.run_page is not None
+
+
+class SyncCheckpoint:
+    """
+    JSON file of the `SyncState` per synced catalog, written atomically after every stored page.
+
+        checkpoint = SyncCheckpoint("anilist_sync.json")
+        report = await client.sync_catalog(MediaType.ANIME, index, checkpoint)
+    """
+
+    def __init__(self, path: Union[str, Path] = "anilist_sync.json"):
+        self.path = Path(path)
+        self._states: Dict[str, SyncState] = {}
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self._states = {key: SyncState(**value) for key, value in data.items()}
+            except (ValueError, TypeError) as e:
+                logger.warning(f"Ignoring unreadable sync checkpoint {self.path}: {e}")
+
+    def get(self, key: str) -> SyncState:
+        return self._states.get(key) or SyncState()
+
+    def set(self, key: str, state: SyncState):
+        self._states[key] = state
+        self.save()
+
+    def reset(self, key: Optional[str] = None):
+        """Forget the progress of `key`, or of every catalog, so the next sync starts from scratch."""
+        if key is None:
+            self._states.clear()
+        else:
+            self._states.pop(key, None)
+        self.save()
+
+    def save(self):
+        data = {key: asdict(state) for key, state in self._states.items()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        # a crash mid-write leaves the previous checkpoint intact
+        os.replace(tmp_path, self.path)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._states
+
+
+@dataclass
+class SyncReport:
+    key: str
+    since: Optional[int]  # high-water mark the sync started from, None for a full crawl
+    updated_at: Optional[int]  # new high-water mark
+    pages: int = 0
+    fetched: int = 0
+    stored: int = 0
+    resumed_from_page: Optional[int] = None
+    elapsed: float = 0.0
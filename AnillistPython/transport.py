@@ -0,0 +1,138 @@
+import asyncio
+import importlib.util
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from gql.transport.exceptions import TransportAlreadyConnected
+from gql.transport.httpx import HTTPXAsyncTransport
+from loguru import logger
+
+# headers of the responses received inside the current `capture_response_headers` block
+_response_headers: ContextVar[Optional[List[httpx.Headers]]] = ContextVar("anilist_response_headers", default=None)
+
+
+async def _record_response_headers(response: httpx.Response):
+    captured = _response_headers.get()
+    if captured is not None:
+        captured.append(response.headers)
+
+
+@contextmanager
+def capture_response_headers() -> Iterator[List[httpx.Headers]]:
+    """
+    Collect the headers of the responses to the requests sent inside the block.
+
+    The headers are kept per task, unlike gql's `transport.response_headers` which holds the last response of
+    any concurrent request sent over the transport.
+    """
+    captured: List[httpx.Headers] = []
+    token = _response_headers.set(captured)
+    try:
+        yield captured
+    finally:
+        _response_headers.reset(token)
+
+
+def last_response_headers() -> Optional[httpx.Headers]:
+    """Headers of the last response received inside the enclosing `capture_response_headers` block."""
+    captured = _response_headers.get()
+    return captured[-1] if captured else None
+
+
+@dataclass(frozen=True)
+class TransportConfig:
+    """
+    HTTP settings of the connection to AniList.
+
+    :param http2: multiplex concurrent requests over one connection, needs the `http2` extra
+        (`pip install AnilistPython[http2]`)
+    :param max_connections: upper bound of open connections
+    :param max_keepalive_connections: idle connections kept open for reuse
+    :param keepalive_expiry: seconds an idle connection is kept open
+    :param timeout: seconds allowed for reading, writing and waiting for a pooled connection
+    :param connect_timeout: seconds allowed for establishing a connection
+    :param compression: ask for compressed responses, gzip and deflate always and brotli/zstd when their
+        decoders are installed
+    :param shared_pool: clients created with an equal config in the same event loop share one connection pool
+    """
+    http2: bool = False
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    timeout: float = 30.0
+    connect_timeout: float = 10.0
+    compression: bool = True
+    shared_pool: bool = False
+
+    def __post_init__(self):
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            raise ImportError("HTTP/2 needs the h2 package, install it with `pip install AnilistPython[http2]`")
+
+    def client_kwargs(self) -> Dict[str, Any]:
+        """Arguments of the `httpx.AsyncClient` built from this config."""
+        kwargs: Dict[str, Any] = {
+            "http2": self.http2,
+            "limits": httpx.Limits(max_connections=self.max_connections,
+                                   max_keepalive_connections=self.max_keepalive_connections,
+                                   keepalive_expiry=self.keepalive_expiry),
+            "timeout": httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            "event_hooks": {"response": [_record_response_headers]},
+        }
+        if not self.compression:
+            kwargs["headers"] = {"Accept-Encoding": "identity"}
+        return kwargs
+
+
+class _SharedPool:
+    """httpx clients shared by the transports of one config and event loop, closed with their last user."""
+    _clients: Dict[Tuple[TransportConfig, int], Tuple[httpx.AsyncClient, int]] = {}
+
+    @classmethod
+    def acquire(cls, config: TransportConfig) -> httpx.AsyncClient:
+        # connections belong to the event loop that opened them
+        key = (config, id(asyncio.get_running_loop()))
+        client, users = cls._clients.get(key, (None, 0))
+        if client is None or client.is_closed:
+            client, users = httpx.AsyncClient(**config.client_kwargs()), 0
+            logger.debug(f"Opened shared connection pool for {config}")
+        cls._clients[key] = (client, users + 1)
+        return client
+
+    @classmethod
+    async def release(cls, config: TransportConfig, client: httpx.AsyncClient):
+        key = (config, id(asyncio.get_running_loop()))
+        shared, users = cls._clients.get(key, (None, 0))
+        if shared is not client:
+            await client.aclose()
+            return
+        if users > 1:
+            cls._clients[key] = (client, users - 1)
+            return
+        del cls._clients[key]
+        await client.aclose()
+        logger.debug(f"Closed shared connection pool for {config}")
+
+
+class PooledHTTPXAsyncTransport(HTTPXAsyncTransport):
+    """`HTTPXAsyncTransport` configured from a `TransportConfig`, optionally on a process wide shared pool."""
+
+    def __init__(self, url: str, config: Optional[TransportConfig] = None, **kwargs: Any):
+        self.config = config or TransportConfig()
+        super().__init__(url=url, **{**self.config.client_kwargs(), **kwargs})
+
+    async def connect(self):
+        if not self.config.shared_pool:
+            return await super().connect()
+        if self.client:
+            raise TransportAlreadyConnected("Transport is already connected")
+        self.client = _SharedPool.acquire(self.config)
+
+    async def close(self):
+        if not self.config.shared_pool:
+            return await super().close()
+        if self.client:
+            client, self.client = self.client, None
+            await _SharedPool.release(self.config, client)
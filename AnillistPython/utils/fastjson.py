@@ -0,0 +1,59 @@
+"""
+JSON codec used for API responses and the response cache.
+
+orjson or msgspec is picked at import time when installed (`pip install AnilistPython[fast]`), the standard
+library `json` otherwise. `loads` accepts both `str` and `bytes`.
+"""
+import json
+from typing import Any, Callable, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _std_loads(data: Union[str, bytes]) -> Any:
+    return json.loads(data)
+
+
+def _std_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+    loads: Callable[[Union[str, bytes]], Any] = orjson.loads
+    dumps: Callable[[Any], bytes] = orjson.dumps
+elif msgspec is not None:
+    BACKEND = "msgspec"
+    loads = msgspec.json.Decoder().decode
+    dumps = msgspec.json.Encoder().encode
+else:
+    BACKEND = "json"
+    loads = _std_loads
+    dumps = _std_dumps
+
+
+if __name__ == "__main__":
+    # python -m AnillistPython.utils.fastjson response.json [...]
+    import sys
+    from pathlib import Path
+    from timeit import timeit
+
+    if len(sys.argv) < 2:
+        sys.exit("usage: python -m AnillistPython.utils.fastjson PAYLOAD.json [PAYLOAD.json ...]")
+
+    runs = 200
+    print(f"Decoding with json vs {BACKEND} ({runs} runs)")
+    for path in sys.argv[1:]:
+        payload = Path(path).read_bytes()
+        std_time = timeit(lambda: _std_loads(payload), number=runs)
+        fast_time = timeit(lambda: loads(payload), number=runs)
+        print(f"{Path(path).name:<32} {len(payload) / 1024:>8.1f} KiB  json {std_time / runs * 1e3:.3f} ms  "
+              f"{BACKEND} {fast_time / runs * 1e3:.3f} ms  {std_time / fast_time:.2f}x")
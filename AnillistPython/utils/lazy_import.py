@@ -0,0 +1,39 @@
+"""
+PEP 562 lazy attributes for the package `__init__` modules.
+
+A package maps each public name to the submodule defining it and imports that submodule on first access, so
+`from AnillistPython import MediaGenre` loads the enums without pulling in gql, httpx or graphql-core.
+"""
+import importlib
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+def lazy_exports(package: str, exports: Dict[str, Iterable[str]]) -> Tuple[Callable[[str], Any],
+                                                                           Callable[[], List[str]], List[str]]:
+    """
+    Build the `__getattr__`, `__dir__` and `__all__` of `package`.
+
+    :param package: `__name__` of the package
+    :param exports: relative submodule name (e.g. `.client`) to the names it provides
+    """
+    origins = {name: module for module, names in exports.items() for name in names}
+    package_globals = importlib.import_module(package).__dict__
+
+    def __getattr__(name: str) -> Any:
+        module = origins.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        submodule = importlib.import_module(module, package)
+        try:
+            value = getattr(submodule, name)
+        except AttributeError:
+            # exported submodules, e.g. `AnillistPython.search_parser`
+            value = importlib.import_module(f"{submodule.__name__}.{name}")
+        # later lookups are plain module attribute reads
+        package_globals[name] = value
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(package_globals) | set(origins))
+
+    return __getattr__, __dir__, list(origins)
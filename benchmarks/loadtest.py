@@ -0,0 +1,199 @@
+"""
+Load test of `AniListClient` against the local mock server (or any AniList compatible endpoint).
+
+Requests are started at a fixed rate (open loop) regardless of how fast earlier ones finish, so queueing in
+the client shows up in the latency percentiles. Without `--url` a `MockAniListServer` is started in-process.
+
+    python benchmarks/loadtest.py --rps 50 --duration 10 --latency 0.05
+    python benchmarks/loadtest.py --rps 200 --mix get_anime=1 --client-rpm 0 --error-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from loguru import logger
+
+from AnillistPython import AniListClient, MediaQueryBuilder, SearchQueryBuilder, MediaSort
+from AnillistPython.transport import TransportConfig
+from mock_server import MockAniListServer
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def make_operations(client: AniListClient, id_range: int) -> Dict[str, Callable[[], Awaitable[object]]]:
+    builder = MediaQueryBuilder().include_title().include_images().include_score().include_info()
+    filters = SearchQueryBuilder().set_sort(MediaSort.POPULARITY_DESC)
+
+    async def get_anime():
+        return await client.get_anime(random.randint(1, id_range), builder)
+
+    async def search_anime():
+        return await client.search_anime(builder, filters, None, page=random.randint(1, 10), perpage=10)
+
+    return {"get_anime": get_anime, "search_anime": search_anime}
+
+
+async def run_load(client: AniListClient, rps: float, duration: float, mix: Dict[str, float],
+                   id_range: int) -> Dict[str, object]:
+    operations = make_operations(client, id_range)
+    unknown = set(mix) - set(operations)
+    if unknown:
+        raise ValueError(f"Unknown operations {sorted(unknown)}, choose from {sorted(operations)}")
+    names, weights = list(mix), list(mix.values())
+
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Counter = Counter()
+
+    async def one(name: str):
+        started = time.perf_counter()
+        try:
+            await operations[name]()
+        except Exception as e:
+            errors[f"{name}: {type(e).__name__}"] += 1
+            return
+        latencies[name].append(time.perf_counter() - started)
+
+    # warm up the connection and the document cache so the first requests do not skew the numbers
+    await client._ensure_connected()
+
+    tasks = []
+    interval = 1 / rps
+    started = time.perf_counter()
+    total = int(rps * duration)
+    for i in range(total):
+        delay = started + i * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(random.choices(names, weights)[0])))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    every = [latency for samples in latencies.values() for latency in samples]
+    report: Dict[str, object] = {
+        "target_rps": rps,
+        "sent": total,
+        "completed": len(every),
+        "errors": dict(errors),
+        "elapsed": elapsed,
+        "throughput": len(every) / elapsed if elapsed else 0.0,
+        "operations": {},
+    }
+    for name, samples in [("all", every)] + list(latencies.items()):
+        report["operations"][name] = {
+            "count": len(samples),
+            "mean": statistics.fmean(samples) if samples else 0.0,
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+            "max": max(samples, default=0.0),
+        }
+    if client.rate_limiter:
+        report["rate_limiter"] = client.rate_limiter.stats()
+    report["coalesced_requests"] = client.coalesced_requests
+    report["document_cache"] = client.document_cache.stats()
+    return report
+
+
+def print_report(report: Dict[str, object]):
+    print(f"sent {report['sent']} requests at {report['target_rps']:.1f} rps, completed {report['completed']} "
+          f"in {report['elapsed']:.2f}s ({report['throughput']:.1f} rps)")
+    print(f"{'operation':<14} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, stats in report["operations"].items():
+        print(f"{name:<14} {stats['count']:>7} {stats['mean'] * 1e3:>9.1f} {stats['p50'] * 1e3:>9.1f} "
+              f"{stats['p95'] * 1e3:>9.1f} {stats['p99'] * 1e3:>9.1f} {stats['max'] * 1e3:>9.1f}")
+    if report["errors"]:
+        print("errors:", ", ".join(f"{name} x{count}" for name, count in report["errors"].items()))
+    if "rate_limiter" in report:
+        print("rate limiter:", report["rate_limiter"])
+    if "server" in report:
+        print("mock server:", report["server"])
+
+
+async def main_async(args) -> Dict[str, object]:
+    server: Optional[MockAniListServer] = None
+    url = args.url
+    if url is None:
+        server = await MockAniListServer(latency=args.latency, jitter=args.jitter, requests_per_minute=args.server_rpm,
+                                         error_rate=args.error_rate, seed=args.seed).start()
+        url = server.url
+    client = AniListClient(url, offline_schema=True, requests_per_minute=args.client_rpm or None,
+                           burst=args.burst, max_retries=args.max_retries, backoff_base=args.backoff_base,
+                           persisted_queries=args.persisted_queries,
+                           transport_config=TransportConfig(http2=args.http2, max_connections=args.max_connections,
+                                                            max_keepalive_connections=args.max_connections))
+    try:
+        report = await run_load(client, args.rps, args.duration, parse_mix(args.mix), args.id_range)
+        if server is not None:
+            report["server"] = {"requests": server.requests, "throttled": server.throttled,
+                                "bytes_received": server.bytes_received,
+                                "persisted_query_misses": server.persisted_query_misses}
+    finally:
+        await client.close()
+        if server is not None:
+            await server.stop()
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="endpoint to test, defaults to an in-process mock server")
+    parser.add_argument("--rps", type=float, default=20.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to send requests for")
+    parser.add_argument("--mix", default="get_anime=1,search_anime=1", help="operation weights")
+    parser.add_argument("--id-range", type=int, default=500, help="media ids are drawn from 1..id-range")
+    parser.add_argument("--client-rpm", type=int, default=0, help="client rate limit, 0 disables it")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--backoff-base", type=float, default=0.1)
+    parser.add_argument("--latency", type=float, default=0.02, help="mock server latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="mock server random extra latency")
+    parser.add_argument("--server-rpm", type=int, default=None, help="mock server rate limit")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="mock server random 429 probability")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-connections", type=int, default=20, help="client connection pool size")
+    parser.add_argument("--http2", action="store_true", help="use HTTP/2, needs the http2 extra")
+    parser.add_argument("--persisted-queries", action="store_true", help="send query hashes instead of texts")
+    parser.add_argument("-o", "--output", type=Path, help="also write the report as JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="keep the client's debug logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logger.remove()
+        logger.add(sys.stderr, level="WARNING")
+    random.seed(args.seed)
+
+    report = asyncio.run(main_async(args))
+    print_report(report)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+"""
+Local stand-in for the AniList GraphQL API, for load and latency testing without touching the real API.
+
+Queries are executed against the bundled `schema.graphql` with data from `benchmarks/fixtures`, so anything
+the builders produce is validated like AniList would. Latency, a server side rate limit and random 429
+answers can be configured.
+
+    python benchmarks/mock_server.py --port 8787 --latency 0.05 --rpm 90 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import copy
+import hashlib
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from graphql import graphql_sync
+from loguru import logger
+
+from AnillistPython.schema import load_schema
+
+FIXTURES = ROOT / "benchmarks" / "fixtures"
+UPDATED_AT_BASE = 1_700_000_000
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 429: "Too Many Requests"}
+
+
+def _load_fixture(name: str) -> dict:
+    with open(FIXTURES / name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class MockAniListServer:
+    """
+    Minimal HTTP/1.1 server answering GraphQL POST requests on `/`.
+
+    :param latency: seconds added to every answer
+    :param jitter: random extra latency, up to this many seconds
+    :param requests_per_minute: server side limit, answers 429 with Retry-After once exhausted
+    :param error_rate: probability of answering a 429 regardless of the limit
+    :param catalog_size: number of media a search walks through before `hasNextPage` turns false
+    :param persisted_queries: accept automatic persisted queries (query sent as its SHA-256 hash)
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 requests_per_minute: Optional[int] = None, error_rate: float = 0.0, catalog_size: int = 500,
+                 seed: Optional[int] = None, persisted_queries: bool = True):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.requests_per_minute = requests_per_minute
+        self.error_rate = error_rate
+        self.catalog_size = catalog_size
+        self.persisted_queries = persisted_queries
+        self._persisted: Dict[str, str] = {}
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._window: List[float] = []
+        self._connections: Set[asyncio.StreamWriter] = set()
+        # media changed with touch(), newest change first in the listings
+        self._updated_at: Dict[int, int] = {}
+        self._clock = UPDATED_AT_BASE
+
+        self.requests = 0
+        self.throttled = 0
+        self.bytes_received = 0
+        self.persisted_query_misses = 0
+
+        self.schema = load_schema()
+        deep = _load_fixture("media_deep.json")["Media"]
+        page_media = _load_fixture("search_page.json")["Page"]["media"]
+        self._pool: List[Dict[str, Any]] = [deep] + page_media
+        self._activities: List[Dict[str, Any]] = _load_fixture("user_activity.json")["Page"]["activities"]
+        self._root = {"Media": self._resolve_media, "Page": self._resolve_page}
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _media(self, media_id: int) -> Optional[Dict[str, Any]]:
+        if media_id is None or not 0 < media_id <= self.catalog_size:
+            return None
+        media = copy.copy(self._pool[media_id % len(self._pool)])
+        media["id"] = media_id
+        media["siteUrl"] = f"https://anilist.co/anime/{media_id}"
+        # lower ids changed last, so the id order below is also the UPDATED_AT_DESC order
+        media["updatedAt"] = self._updated_at.get(media_id, UPDATED_AT_BASE - media_id)
+        return media
+
+    def touch(self, *media_ids: int, updated_at: Optional[int] = None) -> int:
+        """Mark media as changed, by default one second after the last change. Returns their `updatedAt`."""
+        if updated_at is None:
+            self._clock += 1
+            updated_at = self._clock
+        self._clock = max(self._clock, updated_at)
+        for media_id in media_ids:
+            self._updated_at[media_id] = updated_at
+        return updated_at
+
+    def _listing_ids(self, start: int, count: int) -> List[int]:
+        if not self._updated_at:
+            return list(range(start, min(start + count - 1, self.catalog_size) + 1))
+        touched = sorted(self._updated_at, key=lambda media_id: (-self._updated_at[media_id], media_id))
+        untouched = (media_id for media_id in range(1, self.catalog_size + 1) if media_id not in self._updated_at)
+        order = [media_id for media_id in touched if media_id <= self.catalog_size] + list(untouched)
+        return order[start - 1:start - 1 + count]
+
+    def _resolve_media(self, info, id: Optional[int] = None, **kwargs):
+        return self._media(id if id is not None else 1)
+
+    def _resolve_page(self, info, page: int = 1, perPage: int = 50, **kwargs):
+        page = max(page or 1, 1)
+        per_page = min(max(perPage or 50, 1), 50)
+        last_page = max(-(-self.catalog_size // per_page), 1)
+
+        def media(info, id_in: Optional[List[int]] = None, **filters):
+            if id_in is not None:
+                return [m for m in (self._media(media_id) for media_id in id_in) if m is not None]
+            return [self._media(media_id) for media_id in self._listing_ids((page - 1) * per_page + 1, per_page)]
+
+        def activities(info, **filters):
+            return [dict(activity, __typename=self._activity_type(activity)) for activity in self._activities[:per_page]]
+
+        return {
+            "pageInfo": {"total": self.catalog_size, "perPage": per_page, "currentPage": page, "lastPage": last_page,
+                         "hasNextPage": page < last_page},
+            "media": media,
+            "activities": activities,
+        }
+
+    @staticmethod
+    def _activity_type(activity: Dict[str, Any]) -> str:
+        kind = activity.get("type")
+        if kind == "TEXT":
+            return "TextActivity"
+        if kind == "MESSAGE":
+            return "MessageActivity"
+        return "ListActivity"
+
+    def _rate_limit(self) -> Tuple[bool, Dict[str, str]]:
+        """Returns whether the request is allowed and the rate limit headers."""
+        headers: Dict[str, str] = {}
+        if self.error_rate and self._random.random() < self.error_rate:
+            return False, {"Retry-After": "1", "X-RateLimit-Remaining": "0"}
+        if not self.requests_per_minute:
+            return True, headers
+
+        now = time.monotonic()
+        self._window = [t for t in self._window if now - t < 60]
+        headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
+        if len(self._window) >= self.requests_per_minute:
+            retry_after = max(int(60 - (now - self._window[0])) + 1, 1)
+            headers.update({"X-RateLimit-Remaining": "0", "Retry-After": str(retry_after)})
+            return False, headers
+        self._window.append(now)
+        headers["X-RateLimit-Remaining"] = str(self.requests_per_minute - len(self._window))
+        return True, headers
+
+    def execute(self, body: bytes) -> Tuple[int, Dict[str, Any], Dict[str, str]]:
+        self.requests += 1
+        allowed, headers = self._rate_limit()
+        if not allowed:
+            self.throttled += 1
+            return 429, {"data": None, "errors": [{"message": "Too Many Requests.", "status": 429}]}, headers
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, {"errors": [{"message": "Invalid JSON body", "status": 400}]}, headers
+        query, error = self._resolve_query(payload)
+        if error:
+            return 200, {"data": None, "errors": [error]}, headers
+        result = graphql_sync(self.schema, query, root_value=self._root,
+                              variable_values=payload.get("variables"), operation_name=payload.get("operationName"))
+        answer: Dict[str, Any] = {"data": result.data}
+        if result.errors:
+            answer["errors"] = [error.formatted for error in result.errors]
+        return (200 if result.data is not None else 400), answer, headers
+
+    def _resolve_query(self, payload: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Query text of the request, looked up by hash for persisted queries, or the error to answer."""
+        persisted = (payload.get("extensions") or {}).get("persistedQuery")
+        query = payload.get("query")
+        if not persisted:
+            return query or "", None
+        if not self.persisted_queries:
+            return "", {"message": "PersistedQueryNotSupported", "extensions": {"code": "PERSISTED_QUERY_NOT_SUPPORTED"}}
+        query_hash = persisted.get("sha256Hash")
+        if query is None:
+            query = self._persisted.get(query_hash)
+            if query is None:
+                self.persisted_query_misses += 1
+                return "", {"message": "PersistedQueryNotFound", "extensions": {"code": "PERSISTED_QUERY_NOT_FOUND"}}
+            return query, None
+        if hashlib.sha256(query.encode("utf-8")).hexdigest() != query_hash:
+            return "", {"message": "provided sha does not match query", "extensions": {"code": "BAD_REQUEST"}}
+        self._persisted[query_hash] = query
+        return query, None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, _, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: Dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.bytes_received += len(body)
+
+                if method != "POST":
+                    status, answer, extra_headers = 405, {"errors": [{"message": "Use POST", "status": 405}]}, {}
+                else:
+                    status, answer, extra_headers = self.execute(body)
+
+                delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+                if delay:
+                    await asyncio.sleep(delay)
+
+                data = json.dumps(answer, separators=(',', ':')).encode("utf-8")
+                response_headers = {"Content-Type": "application/json", "Content-Length": str(len(data)),
+                                    **extra_headers}
+                head = f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n" + "".join(
+                    f"{name}: {value}\r\n" for name, value in response_headers.items()) + "\r\n"
+                writer.write(head.encode("latin-1") + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as e:
+            logger.debug(f"Mock server connection closed: {e}")
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+    async def start(self) -> "MockAniListServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Mock AniList server listening on {self.url}")
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            # idle keep-alive connections would otherwise keep their handlers waiting for a request
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.sleep(0)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency in seconds")
+    parser.add_argument("--rpm", type=int, default=None, help="server side requests per minute")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="probability of a random 429")
+    parser.add_argument("--catalog-size", type=int, default=500)
+    parser.add_argument("--no-persisted-queries", action="store_true", help="reject persisted query hashes")
+    args = parser.parse_args()
+
+    async def serve():
+        server = MockAniListServer(args.host, args.port, args.latency, args.jitter, args.rpm, args.error_rate,
+                                   args.catalog_size, persisted_queries=not args.no_persisted_queries)
+        async with server:
+            await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
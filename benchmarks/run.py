@@ -0,0 +1,258 @@
+"""
+Offline benchmarks for the parsers and query builders.
+
+The fixtures in `benchmarks/fixtures` have the shape of the data returned by `AniListClient.fetch` for the
+builder queries (a single media, a media with deep relations/recommendations, a 50 item search page and a
+user activity page), filled with synthetic values.
+
+    python benchmarks/run.py                         # run everything, write benchmarks/results/<time>.json
+    python benchmarks/run.py -k parse                # only benchmarks whose name contains "parse"
+    python benchmarks/run.py --compare old.json      # fail when a benchmark got slower than --threshold
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from timeit import Timer
+from typing import Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from AnillistPython import (MediaQueryBuilder, MediaQueryBuilderBase, SearchQueryBuilder, MediaType, MediaSort,
+                            MediaGenre, MediaFormat, MediaSeason, parse_media, parse_searched_media,
+                            parse_graphql_media_data)
+from AnillistPython.index import MediaIndex
+from AnillistPython.export import arrow as arrow_export
+from AnillistPython.parser import columns as media_columns
+from AnillistPython.utils import fastjson
+
+FIXTURES = ROOT / "benchmarks" / "fixtures"
+RESULTS = ROOT / "benchmarks" / "results"
+
+BENCHMARKS: List[Tuple[str, Callable[[], Callable[[], object]]]] = []
+
+
+def benchmark(name: str):
+    """Register a setup function returning the callable to time."""
+    def register(setup: Callable[[], Callable[[], object]]):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+def load_fixture(name: str) -> dict:
+    with open(FIXTURES / name, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def full_media_builder() -> MediaQueryBuilder:
+    relation_builder = MediaQueryBuilderBase().include_all(True)
+    recommendation_builder = MediaQueryBuilderBase().include_all(True)
+    return MediaQueryBuilder().include_all(True, 1, 10, relation_builder, recommendation_builder)
+
+
+def search_builder() -> SearchQueryBuilder:
+    return (SearchQueryBuilder().set_sort(MediaSort.POPULARITY_DESC).set_type(MediaType.ANIME)
+            .set_genres([MediaGenre.ACTION, MediaGenre.FANTASY], [MediaGenre.ECCHI])
+            .set_formats([MediaFormat.TV, MediaFormat.ONA]).set_season(MediaSeason.SPRING, 2024)
+            .set_score_range(60, 95).set_episodes_range(6, 30))
+
+
+@benchmark("parse_graphql_media_data.single")
+def _():
+    data = load_fixture("media.json")
+    return lambda: parse_graphql_media_data(data, MediaType.ANIME)
+
+
+@benchmark("parse_media.deep_relations_recommendations")
+def _():
+    media_data = load_fixture("media_deep.json")["Media"]
+    fields = full_media_builder().included_options()
+    return lambda: parse_media(media_data, MediaType.ANIME, *fields)
+
+
+@benchmark("parse_searched_media.page50")
+def _():
+    data = load_fixture("search_page.json")
+    return lambda: parse_searched_media(data, MediaType.ANIME)
+
+
+@benchmark("parse_searched_media.page50_minimal_fields")
+def _():
+    data = load_fixture("search_page.json")
+    fields = {"id", "idMal", "type", "title", "coverImage", "score", "siteUrl"}
+    return lambda: parse_searched_media(data, MediaType.ANIME, fields)
+
+
+@benchmark("MediaQueryBuilder.include_all+build")
+def _():
+    return lambda: full_media_builder().build()
+
+
+@benchmark("MediaQueryBuilder.build")
+def _():
+    builder = full_media_builder()
+    return builder.build
+
+
+@benchmark("MediaQueryBuilder.stable_hash")
+def _():
+    builder = full_media_builder()
+    return builder.stable_hash
+
+
+@benchmark("SearchQueryBuilder.build")
+def _():
+    builder = search_builder()
+    media_builder = MediaQueryBuilder().include_title().include_images().include_score().include_info()
+    return lambda: builder.build(media_builder)
+
+
+@benchmark("search_anime.prepare_query")
+def _():
+    # the builder work AniListClient.search_anime does on every call
+    builder = MediaQueryBuilder().include_title().include_images().include_score().include_info()
+    filters = SearchQueryBuilder().set_sort(MediaSort.POPULARITY_DESC)
+
+    def prepare():
+        media_builder = builder.include_anime_fields()
+        return filters.set_type(MediaType.ANIME).build(media_builder), media_builder.included_options()
+    return prepare
+
+
+@benchmark("MediaQueryBuilder.__hash__")
+def _():
+    builder = full_media_builder()
+    return lambda: {builder: None}
+
+
+@benchmark("SearchQueryBuilder.stable_hash")
+def _():
+    builder = search_builder()
+    return builder.stable_hash
+
+
+def search_page_index() -> MediaIndex:
+    index = MediaIndex(Path(tempfile.mkdtemp()) / "index.sqlite")
+    index.add_many(parse_searched_media(load_fixture("search_page.json"), MediaType.ANIME).medias)
+    return index
+
+
+@benchmark("MediaIndex.search.prefix")
+def _():
+    index = search_page_index()
+    return lambda: index.search("kanata sa")
+
+
+@benchmark("MediaIndex.search.fuzzy+filters")
+def _():
+    index = search_page_index()
+    filters = SearchQueryBuilder().set_genres([MediaGenre.FANTASY]).set_score_range(50).set_sort(MediaSort.SCORE_DESC)
+    return lambda: index.search("swrd", filters)
+
+
+if arrow_export.pa is not None:
+    @benchmark("media_to_record_batch.page50")
+    def _():
+        medias = parse_searched_media(load_fixture("search_page.json"), MediaType.ANIME).medias
+        return lambda: arrow_export.media_to_record_batch(medias)
+
+
+if media_columns.np is not None:
+    @benchmark("parse_media_columns.page50")
+    def _():
+        data = load_fixture("search_page.json")
+        return lambda: media_columns.parse_media_columns([data])
+
+
+def _decode_benchmark(fixture: str):
+    def setup():
+        payload = (FIXTURES / fixture).read_bytes()
+        return lambda: fastjson.loads(payload)
+    return setup
+
+
+for _fixture in ("media.json", "media_deep.json", "search_page.json", "user_activity.json"):
+    benchmark(f"fastjson.loads.{_fixture.removesuffix('.json')}")(_decode_benchmark(_fixture))
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> Dict[str, float]:
+    timer = Timer(func)
+    number, _ = timer.autorange()
+    # autorange targets 0.2s, scale up so each sample takes at least min_time
+    number = max(1, int(number * max(1.0, min_time / 0.2)))
+    samples = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline_path: Path, threshold: float) -> bool:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))["results"]
+    ok = True
+    print(f"\nCompared with {baseline_path} (min time, fail above {threshold:.2f}x):")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        ok = ok and ratio <= threshold
+        print(f"  {name:<48} {ratio:>6.2f}x {flag}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", "--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per sample")
+    parser.add_argument("-o", "--output", type=Path, help="results file, defaults to benchmarks/results/<time>.json")
+    parser.add_argument("--compare", type=Path, help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, setup in BENCHMARKS:
+        if args.filter not in name:
+            continue
+        results[name] = measure(setup(), args.repeat, args.min_time)
+        print(f"{name:<50} {results[name]['min'] * 1e6:>12.2f} µs  ±{results[name]['stdev'] * 1e6:.2f}")
+
+    output = args.output or RESULTS / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "revision": git_revision(),
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "json_backend": fastjson.BACKEND,
+        "results": results,
+    }, indent=2), encoding="utf-8")
+    print(f"\nResults written to {output}")
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
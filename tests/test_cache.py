@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+from AnillistPython import AniListClient
+from AnillistPython.cache import ResponseCache
+from benchmarks.mock_server import MockAniListServer
+
+MEDIA_ID_QUERY = "query ($id: Int) { Media(id: $id) { id } }"
+
+
+def test_response_cache_hit_stale_and_expiry(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite", stale_while_revalidate=0.2)
+    key = ResponseCache.make_key(MEDIA_ID_QUERY, {"id": 1})
+    assert cache.get(key) is None
+
+    cache.set(key, {"Media": {"id": 1}}, ttl=0.1)
+    fresh = cache.get(key)
+    assert fresh.value == {"Media": {"id": 1}} and not fresh.is_stale
+
+    time.sleep(0.15)
+    stale = cache.get(key)
+    assert stale.value == {"Media": {"id": 1}} and stale.is_stale
+
+    time.sleep(0.2)
+    assert cache.get(key) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["stale_hits"] == 1 and cache.stats()["misses"] == 2
+    cache.close()
+
+
+def test_response_cache_survives_reopening(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = ResponseCache(path)
+    cache.set("key", {"value": 1}, ttl=60)
+    size = cache.size_bytes
+    cache.close()
+
+    cache = ResponseCache(path)
+    assert cache.get("key").value == {"value": 1}
+    assert cache.size_bytes == size
+    cache.close()
+
+
+def test_fetch_serves_stale_responses_while_revalidating(tmp_path):
+    async def run():
+        async with MockAniListServer() as server:
+            cache = ResponseCache(tmp_path / "cache.sqlite")
+            client = AniListClient(server.url, offline_schema=True, requests_per_minute=None, response_cache=cache)
+            try:
+                await client.fetch(MEDIA_ID_QUERY, {"id": 1}, cache_ttl=0.1)
+                await client.fetch(MEDIA_ID_QUERY, {"id": 1}, cache_ttl=0.1)
+                requests_while_fresh = server.requests
+
+                await asyncio.sleep(0.15)
+                stale = await client.fetch(MEDIA_ID_QUERY, {"id": 1}, cache_ttl=0.1)
+                # answered from the cache, the refresh runs in the background
+                requests_when_stale = server.requests
+                await asyncio.gather(*client._revalidations.values())
+                refreshed = cache.get(ResponseCache.make_key(MEDIA_ID_QUERY, {"id": 1}))
+            finally:
+                await client.close()
+                cache.close()
+            return requests_while_fresh, stale, requests_when_stale, server.requests, refreshed
+
+    requests_while_fresh, stale, requests_when_stale, requests, refreshed = asyncio.run(run())
+    assert requests_while_fresh == 1
+    assert stale == {"Media": {"id": 1}}
+    assert requests_when_stale == 1
+    assert requests == 2
+    assert not refreshed.is_stale
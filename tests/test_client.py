@@ -0,0 +1,146 @@
+import asyncio
+import socket
+import warnings
+
+import pytest
+
+from AnillistPython import AniListClient
+from AnillistPython.models import MediaType
+from AnillistPython.queries import MediaQueryBuilder, MediaQueryBuilderBase
+from AnillistPython.ratelimit import is_retryable
+from benchmarks.mock_server import MockAniListServer
+
+MEDIA_ID_QUERY = "query ($id: Int) { Media(id: $id) { id } }"
+
+
+async def _with_client(run, **client_kwargs):
+    async with MockAniListServer() as server:
+        client = AniListClient(server.url, offline_schema=True, requests_per_minute=None, **client_kwargs)
+        try:
+            return await run(client)
+        finally:
+            await client.close()
+
+
+def test_cached_document_does_not_keep_variables():
+    async def run(client):
+        return [(await client.fetch(MEDIA_ID_QUERY, variables))["Media"]["id"]
+                for variables in ({"id": 42}, None, {}, {"id": 7})]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        ids = asyncio.run(_with_client(run))
+    # the mock server answers media 1 when no id is sent
+    assert ids == [42, 1, 1, 7]
+
+
+def test_refused_connection_is_retried():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    # nothing listens on the port any more, so every attempt is refused
+
+    async def run():
+        client = AniListClient(f"http://127.0.0.1:{port}", offline_schema=True, requests_per_minute=None,
+                               max_retries=2, backoff_base=0.001)
+        attempts = 0
+        execute = client._execute
+
+        async def counting_execute(*args, **kwargs):
+            nonlocal attempts
+            attempts += 1
+            return await execute(*args, **kwargs)
+
+        client._execute = counting_execute
+        try:
+            with pytest.raises(Exception) as raised:
+                await client.fetch(MEDIA_ID_QUERY, {"id": 1})
+        finally:
+            await client.close()
+        return attempts, raised.value
+
+    attempts, error = asyncio.run(run())
+    assert is_retryable(error)
+    assert attempts == 3
+
+
+def test_rate_limit_headers_reach_the_limiter():
+    async def run():
+        async with MockAniListServer(requests_per_minute=60) as server:
+            client = AniListClient(server.url, offline_schema=True, requests_per_minute=90)
+            try:
+                await asyncio.gather(*(client.fetch(MEDIA_ID_QUERY, {"id": media_id}) for media_id in range(1, 4)))
+            finally:
+                await client.close()
+            return client.rate_limiter
+
+    rate_limiter = asyncio.run(run())
+    # the server advertises a lower limit than the client's
+    assert rate_limiter.requests_per_minute == 60
+
+
+def test_get_media_many_keeps_input_order_and_reports_missing():
+    async def run(client):
+        builder = MediaQueryBuilder().include_title()
+        return await client.get_media_many([5, 3, 9999, 5, 1], builder, MediaType.ANIME)
+
+    batch = asyncio.run(_with_client(run))
+    assert [media.id if media else None for media in batch.medias] == [5, 3, None, 5, 1]
+    assert batch.missing == [9999]
+    assert batch.medias[0] is batch.medias[3]
+    assert batch.medias[0].title is not None
+
+
+def test_get_media_many_chunks_by_fifty():
+    ids = list(range(120, 0, -1))
+
+    async def run():
+        async with MockAniListServer() as server:
+            client = AniListClient(server.url, offline_schema=True, requests_per_minute=None)
+            try:
+                # a base builder selects no relations or recommendations
+                batch = await client.get_media_many(ids, MediaQueryBuilderBase().include_title())
+            finally:
+                await client.close()
+            return batch, server.requests
+
+    batch, requests = asyncio.run(run())
+    assert [media.id for media in batch.medias] == ids
+    assert batch.missing == []
+    assert requests == 3
+
+
+def test_concurrent_identical_fetches_share_one_request():
+    async def run():
+        async with MockAniListServer(latency=0.05) as server:
+            client = AniListClient(server.url, offline_schema=True, requests_per_minute=None)
+            try:
+                results = await asyncio.gather(*(client.fetch(MEDIA_ID_QUERY, {"id": 3}) for _ in range(10)))
+            finally:
+                await client.close()
+            return results, server.requests, client.coalesced_requests
+
+    results, requests, coalesced = asyncio.run(run())
+    assert results == [{"Media": {"id": 3}}] * 10
+    assert requests == 1
+    assert coalesced == 9
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_request():
+    async def run():
+        async with MockAniListServer(latency=0.1) as server:
+            client = AniListClient(server.url, offline_schema=True, requests_per_minute=None)
+            try:
+                first = asyncio.create_task(client.fetch(MEDIA_ID_QUERY, {"id": 3}))
+                second = asyncio.create_task(client.fetch(MEDIA_ID_QUERY, {"id": 3}))
+                await asyncio.sleep(0.02)
+                first.cancel()
+                result = await second
+            finally:
+                await client.close()
+            return first.cancelled(), result, server.requests
+
+    first_cancelled, result, requests = asyncio.run(run())
+    assert first_cancelled
+    assert result == {"Media": {"id": 3}}
+    assert requests == 1
@@ -0,0 +1,55 @@
+"""
+Import time budgets of the lazy `AnillistPython` package.
+
+Each scenario runs in a fresh interpreter under `python -X importtime`. It fails when a heavy dependency (gql,
+httpx, pyarrow, ...) got imported or when the summed self time of the `AnillistPython` modules exceeds its
+budget. Standard library modules are left out of the budget, they are shared with the importing application.
+"""
+import json
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ("gql", "httpx", "graphql", "loguru", "pyarrow", "numpy")
+
+# (name, code, budget in ms)
+SCENARIOS = [
+    ("package", "import AnillistPython", 5.0),
+    ("models", "from AnillistPython import MediaGenre, MediaSort, AnilistMedia", 15.0),
+    ("builders", "from AnillistPython import MediaQueryBuilder, SearchQueryBuilder", 25.0),
+    ("parsers", "from AnillistPython import parse_searched_media, parse_graphql_media_data", 40.0),
+]
+# runs per scenario, the median is compared with the budget
+REPEAT = 3
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+
+def _import(code: str) -> Tuple[float, List[str]]:
+    """Import time of the `AnillistPython` modules in milliseconds and every module imported by `code`."""
+    code = f"{code}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True,
+                               text=True, check=True)
+    elapsed = 0
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match and match.group(3).startswith("AnillistPython"):
+            elapsed += int(match.group(1))
+    return elapsed / 1000, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize("name, code, budget_ms", SCENARIOS, ids=[scenario[0] for scenario in SCENARIOS])
+def test_import_stays_lazy_and_within_budget(name, code, budget_ms):
+    samples = []
+    for _ in range(REPEAT):
+        elapsed, modules = _import(code)
+        samples.append(elapsed)
+        assert [module for module in HEAVY_MODULES if module in modules] == []
+    assert statistics.median(samples) <= budget_ms
@@ -0,0 +1,157 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from AnillistPython.index import MediaIndex, media_index
+from AnillistPython.models import MediaFormat, MediaGenre, MediaSort, MediaStatus, MediaType
+from AnillistPython.parser import parse_media, parse_searched_media
+from AnillistPython.queries import SearchQueryBuilder
+
+FIXTURES = Path(__file__).resolve().parents[1] / "benchmarks" / "fixtures"
+
+
+def _page_medias():
+    with open(FIXTURES / "search_page.json", "r", encoding="utf-8") as f:
+        return parse_searched_media(json.load(f), MediaType.ANIME).medias
+
+
+def _media(media_id: int, romaji: str, popularity: int = 0):
+    return parse_media({"id": media_id, "title": {"romaji": romaji}, "popularity": popularity}, MediaType.ANIME)
+
+
+@pytest.fixture
+def medias():
+    return _page_medias()
+
+
+@pytest.fixture
+def index(tmp_path, medias):
+    index = MediaIndex(tmp_path / "index.sqlite")
+    index.add_many(medias)
+    yield index
+    index.close()
+
+
+def _ids(records):
+    return [record.id for record in records]
+
+
+def test_exact_matches_rank_by_title_prefix_then_popularity(index, medias):
+    saga = [media for media in medias if "saga" in media.title.romaji.lower().split()]
+    results = index.search("saga", limit=len(medias), prefix=False, fuzzy=False)
+    # titles starting with the query get a bonus, ties go to the more popular media
+    expected = sorted(saga, key=lambda media: (not media.title.romaji.lower().startswith("saga"),
+                                               -media.score.popularity, media.id))
+    assert _ids(results) == _ids(expected)
+
+
+def test_exact_prefix_and_fuzzy_weights(index):
+    index.add_many([_media(100, "Tale of Sagashi", popularity=10 ** 9), _media(101, "Sagx Tale", popularity=10 ** 9)])
+    results = _ids(index.search("saga", limit=100))
+    # a prefix match ranks after every exact match, however popular it is
+    assert results.index(100) == len(results) - 1
+    assert 101 not in results
+
+    # "sagz" has no exact or prefix match and is one edit away from both "saga" and "sagx"
+    saga = {record.id for record in index.search("saga", limit=100, prefix=False, fuzzy=False)}
+    assert set(_ids(index.search("sagz", limit=100, prefix=False))) == saga | {101}
+    assert index.search("sagz", prefix=False, fuzzy=False) == []
+    # fuzzy matches of "sagx" are never tried, its exact match is the only result
+    assert _ids(index.search("sagx", limit=100, prefix=False)) == [101]
+
+
+def test_every_token_must_match(index, medias):
+    expected = {media.id for media in medias
+                if {"hoshi", "kimi"} <= set(media.title.romaji.lower().split())}
+    assert set(_ids(index.search("kimi hoshi", limit=100))) == expected
+    assert index.search("kimi zzzzzzzz") == []
+
+
+def test_facet_filters(index, medias):
+    filters = (SearchQueryBuilder().set_formats([MediaFormat.TV, MediaFormat.OVA])
+               .set_status([MediaStatus.FINISHED], is_excluded=True)
+               .set_genres([MediaGenre.FANTASY, MediaGenre.MYSTERY], [MediaGenre.ROMANCE]))
+    expected = {media.id for media in medias
+                if media.info.format in (MediaFormat.TV, MediaFormat.OVA)
+                and media.info.status != MediaStatus.FINISHED
+                and {MediaGenre.FANTASY, MediaGenre.MYSTERY} <= set(media.genres)
+                and MediaGenre.ROMANCE not in media.genres}
+    assert expected
+    assert set(_ids(index.search(filters=filters, limit=100))) == expected
+
+
+def test_range_filters_are_strict_and_skip_missing_values(index, medias):
+    filters = SearchQueryBuilder().set_score_range(60, 80).set_episodes_range(4, 25)
+    expected = {media.id for media in medias
+                if 60 < media.score.average_score < 80 and media.episodes is not None and 4 < media.episodes < 25}
+    assert expected
+    assert set(_ids(index.search(filters=filters, limit=100))) == expected
+
+
+@pytest.mark.parametrize("sort", [MediaSort.EPISODES, MediaSort.EPISODES_DESC])
+def test_sort_puts_missing_values_last(index, medias, sort):
+    results = index.search(filters=SearchQueryBuilder().set_sort(sort), limit=100)
+    episodes = [record.episodes for record in results]
+    present = [value for value in episodes if value is not None]
+    assert present == sorted(present, reverse=sort == MediaSort.EPISODES_DESC)
+    assert episodes[len(present):] == [None] * (len(episodes) - len(present))
+    assert len(present) < len(episodes)
+
+
+def test_unsupported_sort(index):
+    with pytest.raises(ValueError):
+        index.search(filters=SearchQueryBuilder().set_sort(MediaSort.TRENDING_DESC))
+
+
+def test_reopening_loads_the_same_index(tmp_path, index):
+    filters = SearchQueryBuilder().set_formats([MediaFormat.TV])
+    before = index.search("hosh", filters, limit=100)
+    stats = index.stats()
+    index.close()
+
+    reopened = MediaIndex(tmp_path / "index.sqlite")
+    try:
+        assert reopened.stats() == stats
+        assert reopened.search("hosh", filters, limit=100) == before
+        assert reopened.get(3) == index.get(3)
+    finally:
+        reopened.close()
+
+
+def test_failed_add_many_rolls_back(tmp_path, index, monkeypatch):
+    stats = index.stats()
+    encode = media_index._encode
+
+    def failing_encode(record):
+        if record.id == 101:
+            raise RuntimeError("disk full")
+        return encode(record)
+
+    monkeypatch.setattr(media_index, "_encode", failing_encode)
+    with pytest.raises(RuntimeError):
+        index.add_many([_media(100, "Brand New"), _media(101, "Another One"), _media(1, "Renamed")])
+    assert not index._conn.in_transaction
+    assert index.stats() == stats
+    assert 100 not in index
+    assert index.get(1).title.romaji == "Kanata Saga Sword"
+    assert index.search("brand") == []
+
+
+def test_failed_remove_rolls_back(index, monkeypatch):
+    stats = index.stats()
+
+    def failing_terms(record):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(media_index, "_terms", failing_terms)
+    with pytest.raises(RuntimeError):
+        index.remove(1)
+    monkeypatch.undo()
+    assert not index._conn.in_transaction
+    assert 1 in index
+    assert index.stats() == stats
+
+    assert index.remove(1)
+    assert 1 not in index
+    assert not index.remove(1)
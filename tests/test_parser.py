@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+
+from AnillistPython.models import MediaType
+from AnillistPython.parser import compile_parse_plan, parse_media
+from AnillistPython.parser.lazy import LazyAnilistMedia
+
+FIXTURES = Path(__file__).resolve().parents[1] / "benchmarks" / "fixtures"
+
+
+def _media_deep():
+    with open(FIXTURES / "media_deep.json", "r", encoding="utf-8") as f:
+        return json.load(f)["Media"]
+
+
+def test_list_fields_not_included_are_empty():
+    media_data = _media_deep()
+    fields = {"id", "title"}
+    media = parse_media(media_data, MediaType.ANIME, fields)
+    lazy = LazyAnilistMedia(media_data, MediaType.ANIME, compile_parse_plan(fields))
+    for parsed in (media, lazy):
+        assert parsed.relations == []
+        assert parsed.recommendations == []
+        assert parsed.studios == []
+        assert parsed.tags == []
+        assert parsed.characters == []
+        assert parsed.trailer is None
+    # and the empty lists are not shared between media
+    assert parse_media(media_data, MediaType.ANIME, fields).tags is not media.tags
+
+
+def test_plan_matches_a_plan_free_parse():
+    media_data = _media_deep()
+    relation_fields, recommendation_fields = {"id", "title"}, {"id", "coverImage"}
+    plan = compile_parse_plan(None, relation_fields, recommendation_fields)
+    media = parse_media(media_data, MediaType.ANIME, plan=plan)
+    assert media == parse_media(media_data, MediaType.ANIME, None, relation_fields, recommendation_fields)
+    assert media.relations and media.relations[0].media.tags == []
@@ -0,0 +1,56 @@
+from graphql import graphql_sync, parse, validate
+
+from AnillistPython.models import MediaFormat, MediaGenre, MediaSeason, MediaSort, MediaSource, MediaStatus, \
+    MediaType
+from AnillistPython.queries import MediaQueryBuilder, SearchQueryBuilder
+from AnillistPython.queries.search_media import FILTER_VARIABLE_TYPES
+from AnillistPython.schema import load_schema
+
+# sets every filter of FILTER_VARIABLE_TYPES
+ALL_FILTERS = (SearchQueryBuilder()
+               .set_sort(MediaSort.POPULARITY_DESC)
+               .set_type(MediaType.ANIME)
+               .set_formats([MediaFormat.TV])
+               .set_formats([MediaFormat.MOVIE], is_excluded=True)
+               .set_status([MediaStatus.FINISHED])
+               .set_status([MediaStatus.CANCELLED], is_excluded=True)
+               .set_sources([MediaSource.MANGA])
+               .set_season(MediaSeason.SPRING, 2020)
+               .set_genres([MediaGenre.ACTION], ["Drama"])
+               .set_tags(["Isekai"], ["Gore"])
+               .set_score_range(60, 90)
+               .set_episodes_range(1, 30)
+               .set_duration_range(10, 30)
+               .set_chapters_range(1, 100)
+               .set_year_range(2000, 2020)
+               .set_adult(False))
+
+
+def test_every_filter_is_set():
+    assert set(ALL_FILTERS.filter_variables()) == set(FILTER_VARIABLE_TYPES)
+
+
+def test_filter_variables_match_the_schema():
+    schema = load_schema()
+    builder = MediaQueryBuilder().include_title()
+    for name in FILTER_VARIABLE_TYPES:
+        filters = SearchQueryBuilder()._set_filter(name, dict(ALL_FILTERS.filters)[name])
+        query = filters.build(builder)
+        assert validate(schema, parse(query)) == [], name
+        # coercing the variable values fails on a value the declared type does not accept
+        variables = {**filters.filter_variables(), "query": "x", "page": 1, "perpage": 5}
+        result = graphql_sync(schema, query, root_value={}, variable_values=variables)
+        assert result.errors is None, (name, result.errors)
+
+    query = ALL_FILTERS.build(builder)
+    assert validate(schema, parse(query)) == []
+    result = graphql_sync(schema, query, root_value={}, variable_values=ALL_FILTERS.filter_variables())
+    assert result.errors is None, result.errors
+
+
+def test_filter_values_stay_out_of_the_query_text():
+    builder = MediaQueryBuilder().include_title()
+    tv = SearchQueryBuilder().set_formats([MediaFormat.TV])
+    movie = SearchQueryBuilder().set_formats([MediaFormat.MOVIE])
+    assert tv.build(builder) == movie.build(builder)
+    assert tv.filter_variables() == {"format_in": ["TV"]}
@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+
+from AnillistPython import AniListClient
+from AnillistPython.index import MediaIndex
+from AnillistPython.models import MediaType
+from AnillistPython.sync import SyncCheckpoint, SyncState
+from benchmarks.mock_server import MockAniListServer, UPDATED_AT_BASE
+
+CATALOG_SIZE = 120
+KEY = "anime"
+
+
+class RecordingStore:
+    """Store remembering the ids of every add_many call, failing on call number `fail_on`."""
+
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+
+    def add_many(self, medias):
+        if len(self.calls) + 1 == self.fail_on:
+            self.fail_on = None
+            raise RuntimeError("store failed")
+        self.calls.append([media.id for media in medias])
+
+    @property
+    def ids(self):
+        return [media_id for call in self.calls for media_id in call]
+
+
+async def _sync(server, store, checkpoint):
+    client = AniListClient(server.url, offline_schema=True, requests_per_minute=None)
+    try:
+        return await client.sync_catalog(MediaType.ANIME, store, checkpoint, key=KEY)
+    finally:
+        await client.close()
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    return SyncCheckpoint(tmp_path / "sync.json")
+
+
+def test_full_then_incremental_sync(checkpoint):
+    async def run():
+        async with MockAniListServer(catalog_size=CATALOG_SIZE) as server:
+            store = RecordingStore()
+            full = await _sync(server, store, checkpoint)
+            full_ids = store.ids
+
+            store = RecordingStore()
+            requests = server.requests
+            unchanged = await _sync(server, store, checkpoint)
+            return full, full_ids, unchanged, store.ids, server.requests - requests
+
+    full, full_ids, unchanged, unchanged_ids, unchanged_requests = asyncio.run(run())
+    assert full.since is None
+    assert full.pages == 3 and full.fetched == CATALOG_SIZE and full.stored == CATALOG_SIZE
+    assert full_ids == list(range(1, CATALOG_SIZE + 1))
+    # the newest change is media 1
+    assert full.updated_at == UPDATED_AT_BASE - 1
+    assert checkpoint.get(KEY) == SyncState(UPDATED_AT_BASE - 1, [1])
+
+    assert unchanged.since == UPDATED_AT_BASE - 1
+    assert unchanged.stored == 0 and unchanged_ids == []
+    assert unchanged.pages == 1 and unchanged_requests == 1
+    assert checkpoint.get(KEY) == SyncState(UPDATED_AT_BASE - 1, [1])
+
+
+def test_sync_picks_up_changed_media(checkpoint):
+    async def run():
+        async with MockAniListServer(catalog_size=CATALOG_SIZE) as server:
+            await _sync(server, RecordingStore(), checkpoint)
+            server.touch(5)
+            updated_at = server.touch(77)
+            store = RecordingStore()
+            report = await _sync(server, store, checkpoint)
+            return report, store.ids, updated_at
+
+    report, ids, updated_at = asyncio.run(run())
+    assert ids == [77, 5]
+    assert report.stored == 2 and report.pages == 1
+    assert checkpoint.get(KEY) == SyncState(updated_at, [77])
+
+
+def test_media_sharing_the_high_water_mark(tmp_path, checkpoint):
+    async def run():
+        async with MockAniListServer(catalog_size=CATALOG_SIZE) as server:
+            index = MediaIndex(tmp_path / "index.sqlite")
+            try:
+                await _sync(server, index, checkpoint)
+                updated_at = server.touch(3, 4)
+                first = RecordingStore()
+                await _sync(server, first, checkpoint)
+                after_first = checkpoint.get(KEY)
+
+                # a change within the same second as the checkpoint is still picked up, the stored ones are not
+                server.touch(9, updated_at=updated_at)
+                second = RecordingStore()
+                await _sync(server, second, checkpoint)
+                return updated_at, first.ids, after_first, second.ids, len(index), index.get(4).updated_at
+            finally:
+                index.close()
+
+    updated_at, first_ids, after_first, second_ids, indexed, indexed_updated_at = asyncio.run(run())
+    assert indexed == CATALOG_SIZE and indexed_updated_at == UPDATED_AT_BASE - 4
+    assert first_ids == [3, 4]
+    assert after_first == SyncState(updated_at, [3, 4])
+    assert second_ids == [9]
+    assert checkpoint.get(KEY) == SyncState(updated_at, [3, 4, 9])
+
+
+def test_interrupted_sync_resumes_from_its_last_page(tmp_path):
+    path = tmp_path / "sync.json"
+
+    async def run():
+        async with MockAniListServer(catalog_size=CATALOG_SIZE) as server:
+            failing = RecordingStore(fail_on=2)
+            with pytest.raises(RuntimeError):
+                await _sync(server, failing, SyncCheckpoint(path))
+            interrupted = SyncCheckpoint(path).get(KEY)
+
+            store = RecordingStore()
+            report = await _sync(server, store, SyncCheckpoint(path))
+            return failing.ids, interrupted, report, store.calls
+
+    stored_before, interrupted, report, calls = asyncio.run(run())
+    assert stored_before == list(range(1, 51))
+    # page 1 was stored, the checkpoint was written before page 2 failed
+    assert interrupted.in_progress and interrupted.run_page == 1
+    assert interrupted.updated_at is None
+    assert interrupted.run_updated_at == UPDATED_AT_BASE - 1 and interrupted.run_ids == [1]
+
+    assert report.resumed_from_page == 1
+    assert [call[0] for call in calls] == [1, 51, 101]
+    assert report.pages == 3
+    final = SyncCheckpoint(path).get(KEY)
+    assert not final.in_progress
+    assert final == SyncState(UPDATED_AT_BASE - 1, [1])
+
+
+def test_checkpoint_file(tmp_path):
+    path = tmp_path / "sync.json"
+    checkpoint = SyncCheckpoint(path)
+    checkpoint.set("a", SyncState(10, [1, 2], 12, [3], 4))
+    checkpoint.set("b", SyncState(20, [5]))
+
+    reloaded = SyncCheckpoint(path)
+    assert reloaded.get("a") == SyncState(10, [1, 2], 12, [3], 4)
+    assert "b" in reloaded and reloaded.get("missing") == SyncState()
+    reloaded.reset("a")
+    assert "a" not in SyncCheckpoint(path)
+
+    path.write_text("not json", encoding="utf-8")
+    assert SyncCheckpoint(path).get("b") == SyncState()
@@ -0,0 +1,26 @@
+import asyncio
+
+import httpx
+
+from AnillistPython.transport import TransportConfig, capture_response_headers, last_response_headers
+
+
+def test_response_headers_are_captured_per_task():
+    async def handler(request: httpx.Request) -> httpx.Response:
+        delay = float(request.url.params["delay"])
+        await asyncio.sleep(delay)
+        return httpx.Response(200, headers={"X-Delay": str(delay)})
+
+    async def request(client: httpx.AsyncClient, delay: float):
+        with capture_response_headers() as captured:
+            await client.get("http://anilist.test/", params={"delay": delay})
+            return [headers["X-Delay"] for headers in captured], last_response_headers()["X-Delay"]
+
+    async def run():
+        # the slow request is sent first and answered last
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler),
+                                     **TransportConfig().client_kwargs()) as client:
+            return await asyncio.gather(request(client, 0.05), request(client, 0.0))
+
+    assert asyncio.run(run()) == [(["0.05"], "0.05"), (["0.0"], "0.0")]
+    assert last_response_headers() is None